@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from loguru import logger
+
+
+MANIFEST_NAME = "manifest.json"
+ASSET_FOLDERS = ("normal", "shiny", "sprite")
+# Failed downloads are tried again after a week instead of being skipped forever
+DEFAULT_RETRY_AFTER = 7 * 24 * 60 * 60
+# Manifest is rewritten after this many changes, and always on flush()
+_SAVE_EVERY = 100
+
+
+class AssetManifest:
+    # Single index of every downloaded image, keyed by "<folder>/<file>", e.g. "sprite/025.png".
+    # Each record holds status ("ok" or "failed"), size, sha256 and the last attempt time,
+    # so planning a sync is a dict lookup per asset instead of stat calls and .err files.
+    def __init__(self, img_file: str | Path, assets: Dict[str, dict]):
+        self.path = Path(img_file) / MANIFEST_NAME
+        self.assets = assets
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, img_file: str | Path) -> AssetManifest:
+        path = Path(img_file) / MANIFEST_NAME
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as manifest_json:
+                return cls(img_file, json.load(manifest_json))
+        manifest = cls(img_file, cls._scan(img_file))
+        with manifest._lock:
+            manifest._save()
+        return manifest
+
+    @staticmethod
+    def _scan(img_file: str | Path) -> Dict[str, dict]:
+        # One-time migration from the old layout: existing images and .err marker files
+        assets = {}
+        for folder in ASSET_FOLDERS:
+            if not (Path(img_file) / folder).is_dir():
+                continue
+            with os.scandir(Path(img_file) / folder) as found:
+                for file in found:
+                    if file.name.endswith(".err"):
+                        assets[f"{folder}/{file.name[:-4]}"] = {
+                            "status": "failed",
+                            "size": 0,
+                            "sha256": None,
+                            "attempted": file.stat().st_mtime,
+                        }
+                    elif file.name.endswith(".png"):
+                        with open(file.path, "rb") as image:
+                            content = image.read()
+                        assets[f"{folder}/{file.name}"] = _ok_record(content)
+        logger.info(f"Built asset manifest from {len(assets)} existing files")
+        return assets
+
+    def needs_download(self, key: str, retry_after: float = DEFAULT_RETRY_AFTER):
+        asset = self.assets.get(key)
+        if asset is None:
+            return True
+        if asset["status"] == "failed":
+            return time.time() - asset["attempted"] >= retry_after
+        return False
+
+    def record_ok(self, key: str, content: bytes):
+        with self._lock:
+            self.assets[key] = _ok_record(content)
+            self._changed()
+
+    def record_failed(self, key: str):
+        with self._lock:
+            self.assets[key] = {
+                "status": "failed",
+                "size": 0,
+                "sha256": None,
+                "attempted": time.time(),
+            }
+            self._changed()
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= _SAVE_EVERY:
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as manifest_json:
+            json.dump(self.assets, manifest_json, indent=2)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+    def flush(self):
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+
+def _ok_record(content: bytes) -> dict:
+    return {
+        "status": "ok",
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "attempted": time.time(),
+    }
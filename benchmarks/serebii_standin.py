@@ -0,0 +1,171 @@
+"""Local stand-in for serebii.net, serving a recorded copy of the site over HTTP.
+
+A recording is an on-disk response cache (see serebii_cache.ResponseCache) filled by a real,
+polite scrape of the first few dex pages and their images:
+
+    python benchmarks/serebii_standin.py record recordings/sv --limit 30
+    python benchmarks/serebii_standin.py serve recordings/sv --latency 0.05 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import serebii_scrape  # noqa: E402
+from dex_store import DexStore  # noqa: E402
+from serebii_cache import ResponseCache  # noqa: E402
+from serebii_session import close_session, configure_session  # noqa: E402
+
+
+def _normalize_path(path: str) -> str:
+    # Dex urls come out as "https://serebii.net//pokedex-sv/..." so collapse repeated slashes
+    return re.sub("/+", "/", path)
+
+
+class SerebiiStandin:
+    # Threaded HTTP server answering every recorded url by path, whichever host it came from.
+    # latency (+ up to jitter) is slept before each answer, error_rate of answers are 503s.
+    def __init__(
+        self,
+        recording_dir: str | Path,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        port: int = 0,
+    ):
+        self.cache = ResponseCache(recording_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.pages = {}
+        for url in self.cache.urls():
+            self.pages[_normalize_path(urlsplit(url).path)] = url
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with standin._random_lock:
+                    standin.requests += 1
+                    delay = standin.latency + standin._random.random() * standin.jitter
+                    fail = standin._random.random() < standin.error_rate
+                time.sleep(delay)
+                url = standin.pages.get(_normalize_path(urlsplit(self.path).path))
+                entry = standin.cache.lookup(url) if url else None
+                if fail or entry is None:
+                    standin.errors += fail
+                    self.send_response(503 if fail else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = standin.cache.to_response(url, entry).content
+                self.send_response(200)
+                if entry["content_type"]:
+                    self.send_header("Content-Type", entry["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> SerebiiStandin:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="serebii-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> SerebiiStandin:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def point_scraper_at(base_url: str):
+    # Send every scraper request to base_url instead of serebii.net
+    serebii_scrape.SEREBII_URL = base_url
+    serebii_scrape.SEREBII_WWW_URL = base_url
+
+
+def record(recording_dir: str | Path, limit: int | None = None):
+    # Scrape the dex index, the first `limit` Pokemon pages and all their images into the
+    # recording. Goes through the normal rate limited session, so it is as slow as a real run.
+    configure_session(cache_dir=recording_dir, max_age=float("inf"))
+    try:
+        urls = serebii_scrape._get_sv_pokedex_urls()[:limit]
+        store = DexStore()
+        for url in urls:
+            serebii_scrape._add_pkmn_forms(store, serebii_scrape.get_pkmn_page(url))
+        for entry in store:
+            for _, image_file_urls, _ in serebii_scrape._image_jobs(
+                entry.to_dict(), "."
+            ):
+                for image_file_url in image_file_urls:
+                    if serebii_scrape.get_url(image_file_url):
+                        break
+    finally:
+        close_session()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record pages from serebii.net")
+    record_parser.add_argument("recording_dir", type=Path)
+    record_parser.add_argument("--limit", type=int, help="only the first N dex pages")
+    serve_parser = commands.add_parser("serve", help="serve a recording")
+    serve_parser.add_argument("recording_dir", type=Path)
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--latency", type=float, default=0.0)
+    serve_parser.add_argument("--jitter", type=float, default=0.0)
+    serve_parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.recording_dir, args.limit)
+    else:
+        standin = SerebiiStandin(
+            args.recording_dir,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            port=args.port,
+        )
+        print(f"Serving {len(standin.pages)} recorded urls on {standin.base_url}")
+        try:
+            standin._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
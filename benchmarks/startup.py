@@ -0,0 +1,131 @@
+"""Startup benchmark for the_gui: how long the import takes and how long until both windows exist.
+
+Each sample runs in a fresh interpreter so nothing is cached between runs. Run it from a
+folder holding the usual data/ files (defaults to the repo root) and compare the JSON output
+between changes. load_dex and the windows run against a scratch copy of data/, so seeding the
+progress store, filling the sprite cache or a first sqlite import never touch the real files:
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import the_gui
+print(json.dumps({"import": time.perf_counter() - start}))
+"""
+
+WINDOW_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import the_gui
+imported = time.perf_counter()
+the_gui.sg.theme("Dark Green 7")
+the_gui.load_settings()
+the_gui.load_dex()
+loaded = time.perf_counter()
+window1 = the_gui.make_window1()
+window2 = the_gui.make_window2()
+shown = time.perf_counter()
+window1.close()
+window2.close()
+print(json.dumps({
+    "import": imported - start,
+    "load_dex": loaded - imported,
+    "make_windows": shown - loaded,
+    "time_to_window": shown - start,
+    "entries": len(the_gui.pkmn_dex),
+}))
+"""
+
+
+def scratch_workdir(workdir: Path, scratch: Path) -> Path:
+    # Copy of workdir/data (minus the response cache and snapshots, the GUI never reads
+    # them) next to a link to the read-only images folder
+    if (workdir / "data").exists():
+        shutil.copytree(
+            workdir / "data",
+            scratch / "data",
+            ignore=shutil.ignore_patterns("http_cache", "*.snapshot.zip"),
+        )
+    if (workdir / "images").exists():
+        (scratch / "images").symlink_to((workdir / "images").resolve())
+    return scratch
+
+
+def run_sample(snippet: str, workdir: Path) -> dict:
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        # Typically no display for Tk, or no data/ folder in workdir
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    ok = [sample for sample in samples if "error" not in sample]
+    summary = {
+        "runs": len(samples),
+        "errors": [s["error"] for s in samples if "error" in s],
+    }
+    for key in ok[0] if ok else []:
+        values = [sample[key] for sample in ok]
+        summary[key] = {
+            "min": min(values),
+            "median": statistics.median(values),
+            "max": max(values),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workdir", type=Path, default=REPO_ROOT)
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    parser.add_argument(
+        "--skip-window", action="store_true", help="import time only, no Tk"
+    )
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "import": summarize(
+            [run_sample(IMPORT_SNIPPET, args.workdir) for _ in range(args.runs)]
+        ),
+    }
+    if not args.skip_window:
+        with tempfile.TemporaryDirectory() as scratch:
+            workdir = scratch_workdir(args.workdir, Path(scratch))
+            results["window"] = summarize(
+                [run_sample(WINDOW_SNIPPET, workdir) for _ in range(args.runs)]
+            )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
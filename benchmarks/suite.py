@@ -0,0 +1,205 @@
+"""Offline scraper and GUI-build benchmarks against a recorded copy of Serebii.
+
+Serves a recording (see serebii_standin.py) locally, with optional latency and error
+injection, and times get_sv_pokedex, get_pkmn_page, generate_data, generate_images,
+generate_pkmn_rows and make_window2. Results are JSON so runs can be diffed:
+
+    python benchmarks/suite.py recordings/sv --latency 0.05 --output results.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger  # noqa: E402
+
+import serebii_scrape  # noqa: E402
+from serebii_session import (  # noqa: E402
+    CircuitBreaker,
+    RetryPolicy,
+    close_session,
+    configure_session,
+)
+from serebii_standin import SerebiiStandin, point_scraper_at  # noqa: E402
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def stats(values: list) -> dict:
+    if not values:
+        return {}
+    return {
+        "count": len(values),
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+        "max": max(values),
+    }
+
+
+def bench_pokedex(repeat: int) -> dict:
+    times = [timed(serebii_scrape.get_sv_pokedex)[0] for _ in range(repeat)]
+    return stats(times)
+
+
+def bench_pages(urls: list) -> dict:
+    times = []
+    for url in urls:
+        try:
+            times.append(timed(serebii_scrape.get_pkmn_page, url)[0])
+        except Exception as e:
+            # Injected errors that outlast the retries raise TransientFetchError
+            logger.debug(f"get_pkmn_page failed for {url}: {e}")
+    result = stats(times)
+    result["failed"] = len(urls) - len(times)
+    return result
+
+
+def bench_generate_data(workdir: Path, concurrency: int | None) -> dict:
+    data_file = workdir / f"dex_{concurrency or 'sequential'}.json"
+    seconds, _ = timed(
+        serebii_scrape.generate_data,
+        data_file,
+        concurrency=concurrency,
+    )
+    entries = len(json.loads(data_file.read_text(encoding="windows-1252")))
+    return {"seconds": seconds, "entries": entries, "file": str(data_file)}
+
+
+def bench_generate_images(data_file: Path, workdir: Path, workers: int | None) -> dict:
+    img_dir = workdir / f"images_{workers or 'sequential'}"
+    img_dir.mkdir()
+    seconds, _ = timed(
+        serebii_scrape.generate_images, data_file, img_dir, workers=workers
+    )
+    files = sum(1 for path in img_dir.rglob("*.png"))
+    return {"seconds": seconds, "images": files, "images_per_second": files / seconds}
+
+
+def bench_gui(data_file: Path, img_dir: Path) -> dict:
+    # Only generate_pkmn_rows runs without a display, make_window2 needs Tk
+    import the_gui
+    from dex_store import DexStore
+    from sprite_bundle import SpriteBundle
+
+    the_gui.pkmn_dex = DexStore.load(data_file)
+    the_gui.IMG_DIR = str(img_dir)
+    result = {"entries": len(the_gui.pkmn_dex)}
+
+    # Sprites the recording has, the stand-in doesn't serve every one
+    sprites = [
+        pkmn.form_image
+        for pkmn in the_gui.pkmn_dex
+        if (img_dir / "sprite" / pkmn.form_image).exists()
+    ]
+
+    def load_sprites():
+        for sprite in sprites:
+            the_gui.image_bytes("sprite", sprite)
+
+    # Every sprite the boxes window shows, as loose files through the sprite cache (cold,
+    # so each one is rendered by Pillow) and then from the bundle, including opening it
+    with tempfile.TemporaryDirectory() as cache_dir:
+        the_gui.sprite_cache.cache_dir = Path(cache_dir)
+        result["sprites_files"] = timed(load_sprites)[0]
+
+    def open_and_load():
+        the_gui.sprite_bundle = SpriteBundle.open(img_dir)
+        load_sprites()
+
+    result["sprites_bundle"] = timed(open_and_load)[0]
+    result["build_positions"] = timed(the_gui.build_positions)[0]
+    result["generate_pkmn_rows"] = timed(the_gui.generate_pkmn_rows)[0]
+    try:
+        seconds, window = timed(the_gui.make_window2)
+        window.close()
+        result["make_window2"] = seconds
+    except Exception as e:
+        result["make_window2"] = None
+        result["make_window2_error"] = str(e)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording_dir", type=Path)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=5, help="get_sv_pokedex samples")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = {
+        "python": sys.version.split()[0],
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+        },
+    }
+    with SerebiiStandin(
+        args.recording_dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    ) as standin, tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        point_scraper_at(standin.base_url)
+        # No throttling and no cache, so only the stand-in and our own code are measured
+        # Retries back off in milliseconds, so injected errors cost retries, not sleeps
+        configure_session(
+            rate=1e6,
+            burst=10**6,
+            cache_dir=None,
+            retry=RetryPolicy(base_delay=0.001, max_delay=0.01),
+            breaker=CircuitBreaker(cooldown=0.01),
+        )
+        results["get_sv_pokedex"] = bench_pokedex(args.repeat)
+        urls = serebii_scrape._get_sv_pokedex_urls()
+        results["get_pkmn_page"] = bench_pages(urls)
+        sequential = bench_generate_data(workdir, None)
+        concurrent = bench_generate_data(workdir, args.concurrency)
+        concurrent["same_as_sequential"] = (
+            Path(sequential["file"]).read_bytes()
+            == Path(concurrent["file"]).read_bytes()
+        )
+        for run in (sequential, concurrent):
+            run["pages_per_second"] = len(urls) / run["seconds"]
+        results["generate_data"] = {"sequential": sequential, "concurrent": concurrent}
+        data_file = Path(sequential["file"])
+        results["generate_images"] = {
+            "sequential": bench_generate_images(data_file, workdir, None),
+            "concurrent": bench_generate_images(data_file, workdir, args.workers),
+        }
+        results["gui"] = bench_gui(data_file, workdir / "images_sequential")
+        results["requests_served"] = standin.requests
+        results["errors_injected"] = standin.errors
+        close_session()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dex_store import DexEntry, DexStore
+
+
+# PC boxes in SV are 6 columns by 5 rows
+ROW_SIZE = 6
+BOX_SIZE = 30
+# Optional {pokemon name: evolution line name} for the line-per-row layouts, e.g.
+# {"Sprigatito": "Sprigatito", "Floragato": "Sprigatito", "Meowscarada": "Sprigatito"}
+EVOLUTION_LINES_FILE = "data/evolution_lines.json"
+
+
+def box_row_pos(count: int, starting_box: int = 1) -> Tuple[int, int, int]:
+    # (box, row, pos) for the count-th slot of the PC, all 1-indexed like in game
+    # floor value of division, then + starting box because PC boxes aren't 0-index
+    box = count // BOX_SIZE + starting_box
+    # Find position inside box
+    _box_index = count % BOX_SIZE
+    # Row finds how many times 6 goes into index rounded down to find row number 0 index. Then 1 index answer.
+    row = _box_index // ROW_SIZE + 1
+    # Pos uses modulo to count 0 to 5 then start over 0 to 5 to find column in pc box. Then 1 index answer.
+    pos = _box_index % ROW_SIZE + 1
+    return box, row, pos
+
+
+def _pdex_order(entry: DexEntry):
+    # Pokemon not in the Paldea dex go last, in the order they were scraped
+    return entry.pdex is None, entry.pdex or 0
+
+
+def _ndex_order(entry: DexEntry):
+    return entry.ndex
+
+
+ORDERS = {"pdex": _pdex_order, "ndex": _ndex_order}
+
+
+@dataclass
+class LayoutPolicy:
+    # Which order entries go into the PC in, and where gaps are left
+    order: str = "pdex"
+    # Move a pokemon to the next box if its forms would be split over two boxes
+    species_per_box: bool = False
+    # Start each evolution line (each pokemon without line data) on a new row
+    line_per_row: bool = False
+
+
+LAYOUTS = {
+    "paldea": LayoutPolicy("pdex"),
+    "national": LayoutPolicy("ndex"),
+    "paldea-species-box": LayoutPolicy("pdex", species_per_box=True),
+    "national-species-box": LayoutPolicy("ndex", species_per_box=True),
+    "paldea-line-rows": LayoutPolicy("pdex", line_per_row=True),
+    "national-line-rows": LayoutPolicy("ndex", line_per_row=True),
+}
+DEFAULT_LAYOUT = "paldea"
+
+
+def load_evolution_lines(
+    lines_file: str | Path = EVOLUTION_LINES_FILE,
+) -> Dict[str, str]:
+    if not Path(lines_file).exists():
+        return {}
+    with open(lines_file, "r", encoding="utf-8") as lines_json:
+        return json.load(lines_json)
+
+
+class PositionTable:
+    # Slot number of every entry of a DexStore, computed in one pass over the dex.
+    # Slots are absolute (slot 30 is box 2, row 1, pos 1 with no offset), so changing the
+    # starting box never recomputes anything, it only shifts the box number.
+    def __init__(self, slots: array, keys: List[Tuple[str, str]]):
+        self.slots = slots
+        self.keys = keys
+
+    @classmethod
+    def build(
+        cls,
+        store: DexStore,
+        policy: LayoutPolicy = LAYOUTS[DEFAULT_LAYOUT],
+        evolution_lines: Optional[Dict[str, str]] = None,
+    ) -> PositionTable:
+        # Sorts the store into the policy's order, so count N in the store is slot slots[N]
+        store.sort_by(ORDERS[policy.order])
+        entries = list(store)
+        lines = evolution_lines or {}
+        # Number of consecutive forms from each entry to the end of its species, one pass back
+        run_left = array("I", bytes(4 * len(entries)))
+        for count in range(len(entries) - 1, -1, -1):
+            same_next = (
+                count + 1 < len(entries)
+                and entries[count + 1].name == entries[count].name
+            )
+            run_left[count] = run_left[count + 1] + 1 if same_next else 1
+        slots = array("I", bytes(4 * len(entries)))
+        slot = 0
+        previous: Optional[DexEntry] = None
+        for count, entry in enumerate(entries):
+            new_species = previous is None or previous.name != entry.name
+            if policy.line_per_row and new_species and slot % ROW_SIZE:
+                previous_line = lines.get(previous.name, previous.name)
+                if lines.get(entry.name, entry.name) != previous_line:
+                    slot += ROW_SIZE - slot % ROW_SIZE
+            if policy.species_per_box and new_species:
+                # Species with more forms than a box holds have to be split anyway
+                forms = run_left[count]
+                if forms <= BOX_SIZE and slot % BOX_SIZE + forms > BOX_SIZE:
+                    slot += BOX_SIZE - slot % BOX_SIZE
+            slots[count] = slot
+            slot += 1
+            previous = entry
+        return cls(slots, [entry.key for entry in entries])
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def position(self, count: int, starting_box: int = 1) -> Tuple[int, int, int]:
+        return box_row_pos(self.slots[count], starting_box)
+
+    def positions(self, starting_box: int = 1) -> List[Tuple[int, int, int]]:
+        return [box_row_pos(slot, starting_box) for slot in self.slots]
+
+    def box_range(self, box: int, starting_box: int = 1) -> range:
+        # Counts of the entries in one box. Slots only go up, so two bisects find them.
+        first_slot = (box - starting_box) * BOX_SIZE
+        return range(
+            bisect_left(self.slots, first_slot),
+            bisect_left(self.slots, first_slot + BOX_SIZE),
+        )
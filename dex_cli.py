@@ -0,0 +1,314 @@
+"""Command line access to the dex, no Tk or display needed.
+
+    python dex_cli.py where Pikachu
+    python dex_cli.py missing --box 7 --format csv
+    python dex_cli.py progress --format json
+    python dex_cli.py scrape --concurrency 4 --dex Paldea Kitakami
+    python dex_cli.py scrape --snapshot
+    python dex_cli.py rebuild --workers 8
+    python dex_cli.py refresh --concurrency 4
+    python dex_cli.py images --workers 8
+    python dex_cli.py bundle
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from loguru import logger
+
+from box_layout import DEFAULT_LAYOUT, LAYOUTS, PositionTable, load_evolution_lines
+from dex_store import DexEntry, DexStore, normalize_form
+from progress_store import PROGRESS_FILE, ProgressStore
+
+
+JSON_FILE = "data/dex_with_img.json"
+SETTINGS_FILE = "data/settings.json"
+IMG_DIR = "images"
+FORMATS = ["text", "json", "csv"]
+
+
+def read_settings(settings_file: str | Path = SETTINGS_FILE) -> dict:
+    # Same settings file the GUI saves, so box numbers match what the GUI shows
+    if not Path(settings_file).exists():
+        return {}
+    with open(settings_file, "r") as settings_json:
+        return json.load(settings_json)
+
+
+def load_dex(data_file: str | Path, storage: str) -> DexStore:
+    # Read only: unlike the GUI, nothing is seeded or imported on first use
+    if storage == "sqlite":
+        import dex_db
+
+        if not Path(dex_db.DB_FILE).exists():
+            raise SystemExit(f"No {dex_db.DB_FILE} yet, open the GUI once to import")
+        return dex_db.load_store(dex_db.connect())
+    pkmn_dex = DexStore.load(data_file)
+    progress = ProgressStore(PROGRESS_FILE)
+    if progress.exists():
+        progress.load()
+        progress.apply_to(pkmn_dex)
+    return pkmn_dex
+
+
+def _record(
+    count: int, entry: DexEntry, positions: PositionTable, starting_box: int
+) -> dict:
+    box, row, pos = positions.position(count, starting_box)
+    return {
+        "name": entry.name,
+        "form": entry.form,
+        "pdex": entry.pdex,
+        "ndex": entry.ndex,
+        "box": box,
+        "row": row,
+        "pos": pos,
+        "caught": entry.complete,
+    }
+
+
+def change_records(report: Dict[str, list]) -> Iterator[dict]:
+    # Flatten refresh_data's report into one row per change, same columns for every kind
+    for change in report["added"]:
+        yield {**_change("added", change), "detail": change["image"]}
+    for change in report["removed"]:
+        yield {**_change("removed", change), "detail": ""}
+    for change in report["renamed"]:
+        yield {
+            "change": "renamed",
+            "name": change["name"],
+            "form": change["new"],
+            "detail": f"was {change['old']}",
+        }
+    for change in report["images"]:
+        yield {
+            **_change("image", change),
+            "detail": f"{change['old']} -> {change['new']}",
+        }
+
+
+def _change(kind: str, change: dict) -> dict:
+    return {"change": kind, "name": change["name"], "form": change["form"]}
+
+
+def _describe(record: dict) -> str:
+    if "change" in record:
+        return f"{record['change']}: {record['name']} ({record['form']}) {record['detail']}".rstrip()
+    if "total" in record:
+        return f"{record['caught']}/{record['total']} caught ({record['percent']:.1f}%)"
+    caught = "caught" if record["caught"] else "missing"
+    return (
+        f"{record['name']} ({record['form']}) - Box {record['box']:02}, "
+        f"Row {record['row']:02}, Position {record['pos']:02} - {caught}"
+    )
+
+
+def write_records(records: Iterable[dict], output_format: str, out=sys.stdout):
+    # Streams: every record is written as soon as it is produced.
+    # json is one object per line (JSON Lines), so it can be piped into jq and friends.
+    writer = None
+    for record in records:
+        if output_format == "json":
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif output_format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(record)
+        else:
+            out.write(_describe(record) + "\n")
+
+
+def where(
+    pkmn_dex: DexStore,
+    positions: PositionTable,
+    name: str,
+    form: Optional[str],
+    starting_box: int,
+) -> Iterator[dict]:
+    # The name index gives every form of the pokemon, form is matched as a substring
+    for entry in pkmn_dex.by_name(name):
+        if (
+            form is None
+            or normalize_form(form).lower() in normalize_form(entry.form).lower()
+        ):
+            yield _record(pkmn_dex.index_of(entry), entry, positions, starting_box)
+
+
+def missing(
+    pkmn_dex: DexStore,
+    positions: PositionTable,
+    box: Optional[int],
+    starting_box: int,
+) -> Iterator[dict]:
+    if box is None:
+        counts: Iterable[int] = range(len(pkmn_dex))
+    else:
+        # Only the entries of that box, no walk over the rest of the dex
+        counts = positions.box_range(box, starting_box)
+    for count in counts:
+        entry = pkmn_dex[count]
+        if not entry.complete:
+            yield _record(count, entry, positions, starting_box)
+
+
+def progress_summary(pkmn_dex: DexStore) -> Iterator[dict]:
+    caught = sum(1 for entry in pkmn_dex if entry.complete)
+    total = len(pkmn_dex)
+    yield {
+        "caught": caught,
+        "total": total,
+        "percent": caught / total * 100 if total else 0.0,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Shared options, accepted after any command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", default=JSON_FILE, help="scraped dex JSON file")
+    common.add_argument("--settings", default=SETTINGS_FILE)
+    common.add_argument(
+        "--storage", choices=["json", "sqlite"], help="defaults to the GUI setting"
+    )
+    common.add_argument(
+        "--box-offset", type=int, help="first PC box, defaults to the GUI setting"
+    )
+    common.add_argument(
+        "--layout", choices=list(LAYOUTS), help="defaults to the GUI setting"
+    )
+    common.add_argument("--format", choices=FORMATS, default="text")
+    common.add_argument("-v", "--verbose", action="store_true")
+
+    parser = argparse.ArgumentParser(
+        prog="dex_cli", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name: str, help: str) -> argparse.ArgumentParser:
+        return commands.add_parser(name, help=help, parents=[common])
+
+    scrape = add_command("scrape", "download the dex from Serebii")
+    refresh = add_command("refresh", "update the dex with changes on Serebii")
+    for command in (scrape, refresh):
+        command.add_argument("--concurrency", type=int)
+        command.add_argument("--rate", type=float, help="requests per second")
+        command.add_argument("--burst", type=int)
+        command.add_argument("--dex", nargs="+", help="regional dexes, default Paldea")
+        command.add_argument("--db", help="also sync this SQLite catalog")
+    scrape.add_argument("--resume", action="store_true")
+    scrape.add_argument(
+        "--refetch",
+        action="store_true",
+        help="fetch pages already in <data>.pages.json again, see also refresh",
+    )
+    scrape.add_argument(
+        "--snapshot", action="store_true", help="also save raw pages for rebuild"
+    )
+
+    rebuild = add_command("rebuild", "re-parse a saved snapshot, no network")
+    rebuild.add_argument("--snapshot", help="defaults to <data>.snapshot.zip")
+    rebuild.add_argument("--workers", type=int, help="processes, default one per core")
+    rebuild.add_argument("--db", help="also sync this SQLite catalog")
+
+    images = add_command("images", "download missing images")
+    images.add_argument("--img-dir", default=IMG_DIR)
+    images.add_argument("--workers", type=int)
+
+    bundle = add_command("bundle", "pack downloaded images into one file for the GUI")
+    bundle.add_argument("--img-dir", default=IMG_DIR)
+
+    where_cmd = add_command("where", "which box a pokemon goes in")
+    where_cmd.add_argument("name")
+    where_cmd.add_argument("form", nargs="?", help="part of the form, e.g. Female")
+
+    missing_cmd = add_command("missing", "entries not caught yet")
+    missing_cmd.add_argument("--box", type=int)
+
+    add_command("progress", "how much of the dex is caught")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING")
+
+    if args.command == "images":
+        # Only the network commands pay for importing httpx, bs4 and Pillow
+        import serebii_scrape
+
+        serebii_scrape.generate_images(args.data, args.img_dir, workers=args.workers)
+        return
+    if args.command == "rebuild":
+        import serebii_scrape
+
+        serebii_scrape.rebuild_data(
+            args.data, args.snapshot, workers=args.workers, db_file=args.db
+        )
+        return
+    if args.command == "bundle":
+        # images already does this after downloading, this is for a manual rebuild
+        from sprite_bundle import build_bundle
+
+        path, count = build_bundle(args.img_dir)
+        print(f"Packed {count} images into {path}")
+        return
+    if args.command in ("scrape", "refresh"):
+        import serebii_scrape
+        from serebii_session import configure_session
+
+        options: Dict = {}
+        if args.rate is not None:
+            options["rate"] = args.rate
+        if args.burst is not None:
+            options["burst"] = args.burst
+        # Both the sequential and the async path take their rate from the shared session
+        configure_session(**options)
+        scrape_options = dict(
+            concurrency=args.concurrency,
+            db_file=args.db,
+            dexes=args.dex or (serebii_scrape.PALDEA_DEX,),
+        )
+        if args.command == "scrape":
+            serebii_scrape.generate_data(
+                args.data,
+                resume=args.resume,
+                refetch=args.refetch,
+                snapshot=args.snapshot,
+                **scrape_options,
+            )
+            return
+        records = change_records(
+            serebii_scrape.refresh_data(args.data, **scrape_options)
+        )
+    else:
+        settings = read_settings(args.settings)
+        storage = args.storage or settings.get("-STORAGE-", "json")
+        starting_box = args.box_offset or settings.get("-BOXOFFSET-", 1)
+        layout = args.layout or settings.get("-LAYOUT-", DEFAULT_LAYOUT)
+        pkmn_dex = load_dex(args.data, storage)
+        # Same position table as the GUI builds, so both agree on every slot
+        positions = PositionTable.build(
+            pkmn_dex, LAYOUTS[layout], load_evolution_lines()
+        )
+        if args.command == "where":
+            records = where(pkmn_dex, positions, args.name, args.form, starting_box)
+        elif args.command == "missing":
+            records = missing(pkmn_dex, positions, args.box, starting_box)
+        else:
+            records = progress_summary(pkmn_dex)
+    try:
+        write_records(records, args.format)
+    except BrokenPipeError:
+        # Output piped into e.g. head, which stopped reading early
+        sys.stdout = open(os.devnull, "w")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable
+
+from loguru import logger
+
+from dex_store import DexEntry, DexStore, normalize_form
+from progress_store import ProgressStore
+
+
+DB_FILE = "data/dex.sqlite3"
+# Completion is tracked per mode so shiny/pokedex tracking can sit next to the living dex
+DEFAULT_MODE = "living"
+IMAGE_KINDS = ("normal", "shiny", "sprite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS species (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    pdex INTEGER,
+    ndex INTEGER
+);
+CREATE INDEX IF NOT EXISTS species_pdex ON species (pdex);
+CREATE INDEX IF NOT EXISTS species_ndex ON species (ndex);
+
+-- Numbers in the regional dexes other than Paldea, e.g. Kitakami
+CREATE TABLE IF NOT EXISTS dex_numbers (
+    species_id INTEGER NOT NULL REFERENCES species (id),
+    dex TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    PRIMARY KEY (species_id, dex)
+);
+
+CREATE TABLE IF NOT EXISTS forms (
+    id INTEGER PRIMARY KEY,
+    species_id INTEGER NOT NULL REFERENCES species (id),
+    form TEXT NOT NULL,
+    form_key TEXT NOT NULL,
+    -- Order the form was scraped in, keeps forms of one species in catalog order
+    position INTEGER NOT NULL,
+    UNIQUE (species_id, form_key)
+);
+
+CREATE TABLE IF NOT EXISTS image_assets (
+    form_id INTEGER NOT NULL REFERENCES forms (id),
+    kind TEXT NOT NULL,
+    file TEXT NOT NULL,
+    PRIMARY KEY (form_id, kind)
+);
+
+CREATE TABLE IF NOT EXISTS completion (
+    form_id INTEGER NOT NULL REFERENCES forms (id),
+    mode TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (form_id, mode)
+);
+"""
+
+_ENTRIES = """
+SELECT species.name, forms.form, species.pdex, species.ndex,
+       COALESCE(completion.complete, 0), image_assets.file
+FROM forms
+JOIN species ON species.id = forms.species_id
+LEFT JOIN image_assets ON image_assets.form_id = forms.id AND image_assets.kind = 'normal'
+LEFT JOIN completion ON completion.form_id = forms.id AND completion.mode = ?
+"""
+
+
+def connect(db_file: str | Path = DB_FILE) -> sqlite3.Connection:
+    # WAL lets the scraper write while the GUI reads
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def is_empty(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT COUNT(*) FROM forms").fetchone()[0] == 0
+
+
+def _form_id(conn: sqlite3.Connection, name: str, form: str) -> int | None:
+    row = conn.execute(
+        "SELECT forms.id FROM forms JOIN species ON species.id = forms.species_id "
+        "WHERE species.name = ? AND forms.form_key = ?",
+        (name, normalize_form(form)),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def sync_catalog(
+    conn: sqlite3.Connection,
+    store: DexStore,
+    renamed: Iterable[Dict[str, str]] = (),
+):
+    # Make the catalog match the store: renamed forms keep their row (and so their
+    # completion rows), then entries are inserted or updated and forms, and species, no
+    # longer in the store are deleted. renamed is refresh_data's {name, old, new} list.
+    with conn:
+        for rename in renamed:
+            conn.execute(
+                "UPDATE forms SET form = ?, form_key = ? "
+                "WHERE form_key = ? AND species_id = "
+                "(SELECT id FROM species WHERE name = ?)",
+                (
+                    rename["new"],
+                    normalize_form(rename["new"]),
+                    normalize_form(rename["old"]),
+                    rename["name"],
+                ),
+            )
+        for position, entry in enumerate(store):
+            conn.execute(
+                "INSERT INTO species (name, pdex, ndex) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET pdex = excluded.pdex, ndex = excluded.ndex",
+                (entry.name, entry.pdex, entry.ndex),
+            )
+            species_id = conn.execute(
+                "SELECT id FROM species WHERE name = ?", (entry.name,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO dex_numbers (species_id, dex, number) VALUES (?, ?, ?)",
+                [
+                    (species_id, dex, number)
+                    for dex, number in entry.dex_numbers.items()
+                ],
+            )
+            conn.execute(
+                "INSERT INTO forms (species_id, form, form_key, position) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (species_id, form_key) DO UPDATE "
+                "SET form = excluded.form, position = excluded.position",
+                (species_id, entry.form, normalize_form(entry.form), position),
+            )
+            form_id = _form_id(conn, entry.name, entry.form)
+            # Every kind of image uses the same file name in its own folder
+            conn.executemany(
+                "INSERT OR REPLACE INTO image_assets (form_id, kind, file) VALUES (?, ?, ?)",
+                [(form_id, kind, entry.form_image) for kind in IMAGE_KINDS],
+            )
+        kept = {(entry.name, normalize_form(entry.form)) for entry in store}
+        gone = [
+            (form_id,)
+            for form_id, name, form_key in conn.execute(
+                "SELECT forms.id, species.name, forms.form_key FROM forms "
+                "JOIN species ON species.id = forms.species_id"
+            ).fetchall()
+            if (name, form_key) not in kept
+        ]
+        for table in ("image_assets", "completion"):
+            conn.executemany(f"DELETE FROM {table} WHERE form_id = ?", gone)
+        conn.executemany("DELETE FROM forms WHERE id = ?", gone)
+        empty = "SELECT id FROM species WHERE id NOT IN (SELECT species_id FROM forms)"
+        conn.execute(f"DELETE FROM dex_numbers WHERE species_id IN ({empty})")
+        conn.execute(f"DELETE FROM species WHERE id IN ({empty})")
+        if gone:
+            logger.info(f"Removed {len(gone)} forms no longer in the catalog")
+
+
+def import_json(
+    conn: sqlite3.Connection,
+    json_file: str | Path,
+    progress: ProgressStore | None = None,
+    mode: str = DEFAULT_MODE,
+):
+    # One-shot import of dex_with_img.json, plus caught flags from the progress store if given
+    store = DexStore.load(json_file)
+    if progress is not None:
+        progress.apply_to(store)
+    sync_catalog(conn, store)
+    with conn:
+        for entry in store:
+            if entry.complete:
+                _set_complete(conn, entry, mode)
+    logger.info(f"Imported {len(store)} entries from {json_file}")
+
+
+def load_store(
+    conn: sqlite3.Connection, mode: str = DEFAULT_MODE, order: str = "pdex"
+) -> DexStore:
+    # Sorted view straight from the indexed query, e.g. order="ndex" for National order
+    if order not in ("pdex", "ndex", "name"):
+        raise ValueError(f"Unknown order {order}")
+    # Pokemon missing from the Paldea dex have no pdex and go last, as in box_layout
+    rows = conn.execute(
+        f"{_ENTRIES} ORDER BY species.{order} IS NULL, species.{order}, forms.position",
+        (mode,),
+    ).fetchall()
+    dex_numbers = {}
+    for name, dex, number in conn.execute(
+        "SELECT species.name, dex, number FROM dex_numbers "
+        "JOIN species ON species.id = dex_numbers.species_id"
+    ):
+        dex_numbers.setdefault(name, {})[dex] = number
+    return DexStore(
+        DexEntry(*row[:4], bool(row[4]), row[5], dict(dex_numbers.get(row[0], {})))
+        for row in rows
+    )
+
+
+def _set_complete(conn: sqlite3.Connection, entry: DexEntry, mode: str):
+    conn.execute(
+        "INSERT INTO completion (form_id, mode, complete) VALUES (?, ?, ?) "
+        "ON CONFLICT (form_id, mode) DO UPDATE SET complete = excluded.complete",
+        (_form_id(conn, entry.name, entry.form), mode, int(entry.complete)),
+    )
+
+
+class SqliteProgress:
+    # Same interface as ProgressStore, but every change is its own single-row transaction,
+    # so there is nothing left to flush on Save.
+    def __init__(self, conn: sqlite3.Connection, mode: str = DEFAULT_MODE):
+        self.conn = conn
+        self.mode = mode
+
+    def record(self, entry: DexEntry):
+        with self.conn:
+            _set_complete(self.conn, entry, self.mode)
+
+    def flush(self):
+        pass
+
+    def start_autosave(self, interval: float):
+        pass
+
+    def stop_autosave(self):
+        pass
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Encoding is from Serebii webpage, same as the rest of the data files.
+DEX_ENCODING = "windows-1252"
+
+
+def normalize_form(form: str) -> str:
+    # Serebii is inconsistent with spacing, e.g. "Paldean FormCombat Breed"
+    return form.replace(" ", "")
+
+
+@dataclass
+class DexEntry:
+    # One trackable slot in the living dex: a pokemon in a specific gender/alt form.
+    # __slots__ keeps per-entry memory down once several dexes are tracked.
+    __slots__ = (
+        "name",
+        "form",
+        "pdex",
+        "ndex",
+        "complete",
+        "form_image",
+        "dex_numbers",
+    )
+    name: str
+    form: str
+    # None for pokemon that are only in another dex, e.g. Kitakami
+    pdex: Optional[int]
+    ndex: int
+    complete: bool
+    form_image: str
+    # Numbers in the other tracked regional dexes, e.g. {"Kitakami": 12}
+    dex_numbers: Dict[str, int]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.name, normalize_form(self.form)
+
+    @classmethod
+    def from_dict(cls, pkmn: dict) -> DexEntry:
+        return cls(
+            name=pkmn["Name"],
+            form=pkmn["Form"],
+            pdex=pkmn["PDex"],
+            ndex=pkmn["NDex"],
+            complete=pkmn["Complete"],
+            form_image=pkmn["Form_Image"],
+            dex_numbers=pkmn.get("Dex_Numbers", {}),
+        )
+
+    def to_dict(self) -> dict:
+        # Same keys and order as the original list-of-dicts JSON file,
+        # Dex_Numbers is only written once another dex is tracked
+        pkmn = {
+            "Name": self.name,
+            "Form": self.form,
+            "PDex": self.pdex,
+            "NDex": self.ndex,
+            "Complete": self.complete,
+            "Form_Image": self.form_image,
+        }
+        if self.dex_numbers:
+            pkmn["Dex_Numbers"] = self.dex_numbers
+        return pkmn
+
+
+class DexStore:
+    # Ordered collection of DexEntry with hash indexes, so the duplicate checks and dex
+    # number lookups are O(1) instead of scanning the whole list.
+    def __init__(self, entries: Iterable[DexEntry] = ()):
+        self._entries: List[DexEntry] = []
+        self._by_key: Dict[Tuple[str, str], DexEntry] = {}
+        # Lower-cased name to every form of that pokemon, for lookups typed by a person
+        self._by_name: Dict[str, List[DexEntry]] = {}
+        self._by_pdex: Dict[int, List[DexEntry]] = {}
+        self._by_ndex: Dict[int, List[DexEntry]] = {}
+        # id(entry) to its place in the order, rebuilt on first use after add/sort
+        self._index_of: Optional[Dict[int, int]] = None
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def load(cls, data_file: str | Path) -> DexStore:
+        with open(data_file, "r", encoding=DEX_ENCODING) as pkmn_json:
+            return cls(DexEntry.from_dict(pkmn) for pkmn in json.load(pkmn_json))
+
+    def save(self, data_file: str | Path):
+        with open(data_file, "w", encoding=DEX_ENCODING) as pkmn_json:
+            json.dump(self.to_list(), pkmn_json, indent=2)
+
+    def to_list(self) -> List[dict]:
+        return [entry.to_dict() for entry in self._entries]
+
+    def add(self, entry: DexEntry) -> bool:
+        # Returns False and skips the entry if the (name, form) pair is already tracked
+        if entry.key in self._by_key:
+            return False
+        self._entries.append(entry)
+        self._index_of = None
+        self._by_key[entry.key] = entry
+        self._by_name.setdefault(entry.name.lower(), []).append(entry)
+        self._by_pdex.setdefault(entry.pdex, []).append(entry)
+        self._by_ndex.setdefault(entry.ndex, []).append(entry)
+        return True
+
+    def remove(self, entry: DexEntry):
+        self._entries.remove(entry)
+        self._unindex(entry)
+
+    def replace(self, old: DexEntry, new: DexEntry):
+        # Swap an entry in place, e.g. a form renamed on Serebii, keeping its spot in the order
+        self._entries[self._entries.index(old)] = new
+        self._unindex(old)
+        self._by_key[new.key] = new
+        self._by_name.setdefault(new.name.lower(), []).append(new)
+        self._by_pdex.setdefault(new.pdex, []).append(new)
+        self._by_ndex.setdefault(new.ndex, []).append(new)
+
+    def _unindex(self, entry: DexEntry):
+        self._index_of = None
+        del self._by_key[entry.key]
+        self._by_name[entry.name.lower()].remove(entry)
+        self._by_pdex[entry.pdex].remove(entry)
+        self._by_ndex[entry.ndex].remove(entry)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        name, form = key
+        return (name, normalize_form(form)) in self._by_key
+
+    def get(self, name: str, form: str) -> Optional[DexEntry]:
+        return self._by_key.get((name, normalize_form(form)))
+
+    def by_name(self, name: str) -> List[DexEntry]:
+        return self._by_name.get(name.lower(), [])
+
+    def by_pdex(self, number: int) -> List[DexEntry]:
+        return self._by_pdex.get(number, [])
+
+    def by_ndex(self, number: int) -> List[DexEntry]:
+        return self._by_ndex.get(number, [])
+
+    def sort_by(self, key: Callable[[DexEntry], Any]):
+        # Stable, so forms keep their scraped order inside each dex number
+        self._entries.sort(key=key)
+        self._index_of = None
+
+    def index_of(self, entry: DexEntry) -> int:
+        if self._index_of is None:
+            self._index_of = {id(e): count for count, e in enumerate(self._entries)}
+        return self._index_of[id(entry)]
+
+    def __getitem__(self, index: int) -> DexEntry:
+        return self._entries[index]
+
+    def __iter__(self) -> Iterator[DexEntry]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
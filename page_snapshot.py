@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from loguru import logger
+
+
+# Raw Pokemon pages of one scrape, so the data file can be rebuilt without the network.
+# A zip so each page is compressed on its own and can be read by any process independently.
+INDEX_NAME = "index.json"
+
+
+def snapshot_path(data_file: str | Path) -> Path:
+    return Path(f"{data_file}.snapshot.zip")
+
+
+class SnapshotWriter:
+    # Collects pages while a scrape runs. The archive is written to a temp file and only
+    # replaces the snapshot when the run finishes, with the dex index written last.
+    def __init__(
+        self,
+        path: str | Path,
+        dexes: Iterable[str],
+        dex_index: Dict[str, Dict[str, int]],
+    ):
+        self.path = Path(path)
+        self.dexes = list(dexes)
+        self.dex_index = dex_index
+        # {page url: {"file": member name, "encoding": body encoding}}
+        self.pages: Dict[str, dict] = {}
+        self._temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        self._archive = zipfile.ZipFile(
+            self._temp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9
+        )
+        self._lock = threading.Lock()
+        # Set once the archive is closed, by close() or by discard()
+        self._finished = False
+
+    def add(self, url: str, content: bytes, encoding: str):
+        with self._lock:
+            member = f"pages/{len(self.pages):05}.html"
+            self._archive.writestr(member, content)
+            self.pages[url] = {"file": member, "encoding": encoding}
+
+    def close(self):
+        with self._lock:
+            index = {
+                "created": time.time(),
+                "dexes": self.dexes,
+                "index": self.dex_index,
+                "pages": self.pages,
+            }
+            self._archive.writestr(INDEX_NAME, json.dumps(index, ensure_ascii=False))
+            self._archive.close()
+            self._finished = True
+        os.replace(self._temp_path, self.path)
+        logger.info(f"Saved {len(self.pages)} pages to {self.path}")
+
+    def discard(self):
+        # Interrupted run, or one missing pages: keep whatever snapshot was there before
+        with self._lock:
+            if self._finished:
+                return
+            self._archive.close()
+            self._finished = True
+        self._temp_path.unlink()
+
+    def __enter__(self) -> SnapshotWriter:
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if self._finished:
+            return
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def read_index(path: str | Path) -> dict:
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read(INDEX_NAME))
+
+
+def read_pages(
+    path: str | Path, pages: List[Tuple[str, str, str]]
+) -> List[Tuple[str, str]]:
+    # (url, decoded html) for each (url, member, encoding), with one open of the archive
+    with zipfile.ZipFile(path) as archive:
+        return [
+            (url, archive.read(member).decode(encoding))
+            for url, member, encoding in pages
+        ]
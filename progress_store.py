@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Set
+
+from loguru import logger
+
+from dex_store import DexEntry, DexStore
+
+
+PROGRESS_FILE = "data/progress.json"
+# Deltas are folded into the snapshot once the log reaches this many lines
+COMPACT_EVERY = 500
+
+
+def entry_id(entry: DexEntry) -> str:
+    # Stable across re-scrapes and re-sorts, unlike the position in the list
+    return "|".join(entry.key)
+
+
+class ProgressStore:
+    # Which entries are caught, kept apart from the scraped catalog in dex_with_img.json.
+    # progress.json is a snapshot of caught entry ids, progress.json.log holds one JSON
+    # delta per line on top of it. Saving only appends the deltas since the last save.
+    def __init__(self, progress_file: str | Path = PROGRESS_FILE):
+        self.path = Path(progress_file)
+        self.log_path = Path(f"{progress_file}.log")
+        self.complete: Set[str] = set()
+        self._pending: List[dict] = []
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        self._autosave: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def exists(self) -> bool:
+        return self.path.exists() or self.log_path.exists()
+
+    def load(self):
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as progress_json:
+                self.complete = set(json.load(progress_json)["complete"])
+        if self.log_path.exists():
+            with open(self.log_path, "r", encoding="utf-8") as progress_log:
+                for line in progress_log:
+                    try:
+                        delta = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-append only loses the last, partial delta
+                        logger.warning(f"Ignoring partial line in {self.log_path}")
+                        continue
+                    self._apply(delta)
+                    self._log_lines += 1
+
+    def _apply(self, delta: dict):
+        if delta["complete"]:
+            self.complete.add(delta["id"])
+        else:
+            self.complete.discard(delta["id"])
+
+    def seed(self, store: DexStore):
+        # First run after the split: take over the Complete flags saved in the catalog
+        self.complete = {entry_id(entry) for entry in store if entry.complete}
+        with self._lock:
+            self._compact()
+
+    def apply_to(self, store: DexStore):
+        for entry in store:
+            entry.complete = entry_id(entry) in self.complete
+
+    def record(self, entry: DexEntry):
+        with self._lock:
+            delta = {"id": entry_id(entry), "complete": entry.complete}
+            self._apply(delta)
+            self._pending.append(delta)
+
+    def rename(self, old_id: str, new_id: str):
+        # Carry a caught flag over to an entry's new id, e.g. a form renamed on Serebii
+        with self._lock:
+            if old_id not in self.complete:
+                return
+            for delta in (
+                {"id": old_id, "complete": False},
+                {"id": new_id, "complete": True},
+            ):
+                self._apply(delta)
+                self._pending.append(delta)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as progress_log:
+                progress_log.write("".join(json.dumps(d) + "\n" for d in self._pending))
+            self._log_lines += len(self._pending)
+            self._pending = []
+            if self._log_lines >= COMPACT_EVERY:
+                self._compact()
+
+    def _compact(self):
+        # Snapshot written to a temp file and renamed, then the log it covers is dropped
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as progress_json:
+            json.dump({"complete": sorted(self.complete)}, progress_json)
+        os.replace(temp_path, self.path)
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self._log_lines = 0
+
+    def start_autosave(self, interval: float):
+        # Flush off the GUI thread every interval seconds
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._autosave = threading.Thread(
+            target=run, name="progress-autosave", daemon=True
+        )
+        self._autosave.start()
+
+    def stop_autosave(self):
+        if self._autosave is not None:
+            self._stop.set()
+            self._autosave.join()
+            self._autosave = None
+        self.flush()
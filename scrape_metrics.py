@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from loguru import logger
+
+
+# Bucket upper bounds, Prometheus style. Anything above the last one lands in +Inf.
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = tuple(1024 * 4**n for n in range(8))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f"{bound:g}", total
+        yield "+Inf", self.count
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class ScrapeMetrics:
+    # Counters and histograms for one scrape run, e.g. how long requests sat behind the
+    # token bucket versus on the network versus in the parser. Safe to use from threads.
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        # Metrics ending in _bytes get byte buckets, everything else is seconds
+        buckets = BYTES_BUCKETS if name.endswith("_bytes") else SECONDS_BUCKETS
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration_seconds": time.time() - self.started,
+                "counters": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in series.items()
+                    ]
+                    for name, series in self.counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {"labels": dict(key), **hist.to_dict()}
+                        for key, hist in series.items()
+                    ]
+                    for name, series in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        # Text exposition format, so the file can be fed to a node_exporter textfile collector
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE dextrack_{name} counter")
+                for key, value in series.items():
+                    lines.append(f"dextrack_{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE dextrack_{name} histogram")
+                for key, hist in series.items():
+                    for bound, count in hist.cumulative():
+                        bucket_key = key + (("le", bound),)
+                        lines.append(
+                            f"dextrack_{name}_bucket{_format_labels(bucket_key)} {count}"
+                        )
+                    lines.append(
+                        f"dextrack_{name}_sum{_format_labels(key)} {hist.sum:g}"
+                    )
+                    lines.append(
+                        f"dextrack_{name}_count{_format_labels(key)} {hist.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix: str | Path):
+        # Writes <prefix>.json and <prefix>.prom
+        Path(prefix).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{prefix}.json", "w", encoding="utf-8") as metrics_json:
+            json.dump(self.to_dict(), metrics_json, indent=2)
+        with open(f"{prefix}.prom", "w", encoding="utf-8") as metrics_prom:
+            metrics_prom.write(self.to_prometheus())
+        logger.info(f"Wrote scrape metrics to {prefix}.json and {prefix}.prom")
+
+    def summary(self) -> str:
+        # One line per histogram for the log, e.g. "request_network_seconds: n=400 mean=0.210s"
+        with self._lock:
+            return "\n".join(
+                f"{name}{_format_labels(key)}: n={hist.count} mean={hist.sum / hist.count:.4g}"
+                f" max={hist.max:.4g}"
+                for name, series in sorted(self.histograms.items())
+                for key, hist in series.items()
+                if hist.count
+            )
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+# The run being recorded, if any. Module level like the shared session, so the session,
+# parser and download threads can report without metrics being passed through every call.
+_active: ScrapeMetrics | None = None
+
+
+def increment(name: str, amount: float = 1, **labels):
+    if _active is not None:
+        _active.increment(name, amount, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    if _active is not None:
+        _active.observe(name, value, **labels)
+
+
+@contextmanager
+def timed(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def recording(prefix: str | Path | None = None) -> Iterator[ScrapeMetrics]:
+    # Record everything reported inside the block, then write it out if prefix is given.
+    # Nested runs (generate_data called by something already recording) share the outer one.
+    global _active
+    if _active is not None:
+        yield _active
+        return
+    metrics = _active = ScrapeMetrics()
+    try:
+        yield metrics
+    finally:
+        _active = None
+        logger.info(f"Scrape metrics:\n{metrics.summary()}")
+        if prefix is not None:
+            metrics.write(prefix)
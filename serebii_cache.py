@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx as httpx
+from loguru import logger
+
+
+DEFAULT_CACHE_DIR = "data/http_cache"
+# Always revalidate by default. Serebii pages change rarely, so that is mostly cheap 304s.
+DEFAULT_MAX_AGE = 0
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Index is rewritten after this many changes, and always on flush()
+_SAVE_EVERY = 50
+
+
+class ResponseCache:
+    # On-disk cache of Serebii responses.
+    # Bodies are stored once per content hash under objects/, and index.json maps each url
+    # to its body hash plus the ETag/Last-Modified validators used to revalidate it.
+    def __init__(
+        self,
+        cache_dir: str | Path = DEFAULT_CACHE_DIR,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._index_file = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._index: Dict[str, dict] = {}
+        if self._index_file.exists():
+            with open(self._index_file, "r", encoding="utf-8") as index_json:
+                self._index = json.load(index_json)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.cache_dir / "objects" / digest[:2] / digest
+
+    def lookup(self, url: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is not None and not self._object_path(entry["sha256"]).exists():
+                # Body was removed from under us, treat as a miss
+                del self._index[url]
+                return None
+            return entry
+
+    def urls(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched"] < self.max_age
+
+    def conditional_headers(self, entry: Optional[dict]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def to_response(self, url: str, entry: dict) -> httpx.Response:
+        # Rebuild a plain 200 response so callers can't tell a cached body from a fresh one
+        headers = (
+            {"content-type": entry["content_type"]} if entry["content_type"] else {}
+        )
+        with open(self._object_path(entry["sha256"]), "rb") as body:
+            return httpx.Response(
+                200,
+                headers=headers,
+                content=body.read(),
+                request=httpx.Request("GET", url),
+            )
+
+    def store(self, url: str, response: httpx.Response):
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            # Written outside the lock, so every thread gets its own temp file. Threads
+            # storing the same body both write it, the last rename wins with equal bytes.
+            temp_path = object_path.with_name(
+                f"{object_path.name}.{threading.get_ident()}.tmp"
+            )
+            with open(temp_path, "wb") as temp:
+                temp.write(body)
+            os.replace(temp_path, object_path)
+        with self._lock:
+            self._index[url] = {
+                "sha256": digest,
+                "size": len(body),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_type": response.headers.get("content-type"),
+                "fetched": time.time(),
+            }
+            self._changed()
+
+    def touch(self, url: str):
+        # Server answered 304, so the cached body is good for another max_age
+        with self._lock:
+            self._index[url]["fetched"] = time.time()
+            self._changed()
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= _SAVE_EVERY:
+            self._save()
+
+    def _evict(self):
+        # Drop the least recently fetched urls until the bodies they reference fit in max_bytes.
+        # Bodies shared by several urls are only deleted once nothing points at them.
+        sizes = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        refs: Dict[str, int] = {}
+        for entry in self._index.values():
+            refs[entry["sha256"]] = refs.get(entry["sha256"], 0) + 1
+        for url, entry in sorted(self._index.items(), key=lambda x: x[1]["fetched"]):
+            if total <= self.max_bytes:
+                break
+            del self._index[url]
+            refs[entry["sha256"]] -= 1
+            if refs[entry["sha256"]] == 0:
+                self._object_path(entry["sha256"]).unlink(missing_ok=True)
+                total -= entry["size"]
+        logger.info(f"Evicted http cache down to {total} bytes")
+
+    def _save(self):
+        self._evict()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self._index_file.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as index_json:
+            json.dump(self._index, index_json)
+        os.replace(temp_path, self._index_file)
+        self._unsaved = 0
+
+    def flush(self):
+        with self._lock:
+            if self._unsaved:
+                self._save()
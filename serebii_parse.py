@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import lxml.html
+from loguru import logger
+from lxml.etree import XPath
+
+
+# Compiled once. Same matches as BeautifulSoup's find("td", class_=..., string=...) in serebii_scrape.
+_FOOEVO_HEADER = XPath(
+    "//td[contains(concat(' ', normalize-space(@class), ' '), ' fooevo ')][. = $header]"
+)
+_PKMN_CELL = XPath(
+    ".//td[contains(concat(' ', normalize-space(@class), ' '), ' pkmn ')]"
+)
+_ROWS = XPath(".//tr")
+_CELLS = XPath(".//td")
+_FIRST_B = XPath("(.//b)[1]")
+_ALT_IMAGES = XPath("//img[@alt]")
+
+
+def _text(element) -> str:
+    # Same as BeautifulSoup's .text, all descendant text joined
+    return "".join(element.itertext())
+
+
+def _find_header(page, header: str):
+    found = _FOOEVO_HEADER(page, header=header)
+    return found[0] if found else None
+
+
+def parse_pkmn_html(html: str) -> Dict:
+    # Single lxml parse with compiled XPath lookups, producing the same pkmn_dict as
+    # get_name_no_gender_from_serebii + get_forms_from_serebii + get_form_images_name.
+    page = lxml.html.document_fromstring(html)
+    pkmn_dict = {}
+    _parse_name_no_gender(pkmn_dict, page)
+    gender_forms = ["Uniform"]
+    alt_forms = None
+    if forms := _parse_specific_form(page, "Alternate Forms"):
+        alt_forms = forms
+    if forms := _parse_specific_form(page, "Gender Differences"):
+        gender_forms = forms
+    pkmn_dict["Gender Forms"] = gender_forms
+    pkmn_dict["Alt Forms"] = alt_forms
+    if alt_forms:
+        _parse_form_images(pkmn_dict, page)
+    return pkmn_dict
+
+
+def _parse_name_no_gender(pkmn_dict: Dict, page):
+    # See get_name_no_gender_from_serebii for the table layout
+    name_no_gender_table = _find_header(page, "Name").getparent().getparent()
+    rows = _ROWS(name_no_gender_table)
+    for header in _CELLS(rows[0]):
+        # Headers might differ, so build off existing
+        pkmn_dict[_text(header)] = None
+    data = [_text(cell) for cell in _CELLS(rows[1])]
+    pkmn_dict["Name"] = data[0]
+    pkmn_dict["No."] = {"Paldea": None, "National": None}
+    pkmn_dict["Gender Ratio"] = {"Male": None, "Female": None}
+    for idx, item in enumerate(data):
+        if item.startswith(("Paldea:", "National:")):
+            pkmn_dict["No."][item.rstrip(": ")] = int(data[idx + 1].replace("#", ""))
+        if item.startswith("Male ♂:"):
+            pkmn_dict["Gender Ratio"]["Male"] = data[idx + 1]
+        if item.startswith("Female ♀:"):
+            pkmn_dict["Gender Ratio"]["Female"] = data[idx + 1]
+
+
+def _parse_specific_form(page, search_string: str) -> List[str] | None:
+    # See _get_specific_form for the table layout
+    header = _find_header(page, search_string)
+    if header is None:
+        return None
+    form_cells = _PKMN_CELL(header.getparent().getparent())
+    if not form_cells:
+        return None
+    forms = []
+    for row in _ROWS(form_cells[0].getparent().getparent()):
+        # Only the name row of each name/img/blank triple has a b tag
+        for cell in _PKMN_CELL(row):
+            if bold := _FIRST_B(cell):
+                forms.append(_text(bold[0]))
+    logger.debug(f"Found {search_string}: {forms}")
+    return forms
+
+
+def _parse_form_images(pkmn_dict: Dict, page):
+    # One pass over every img with an alt, keeping the first match per form
+    first_image = {}
+    for image in _ALT_IMAGES(page):
+        first_image.setdefault(image.get("alt"), image)
+    pkmn_dict["Form_to_Img"] = []
+    for form in pkmn_dict["Alt Forms"]:
+        form_image = first_image.get(form)
+        if form_image is not None and form_image.get("src") is not None:
+            pkmn_dict["Form_to_Img"].append(
+                (form, f"{form_image.get('src').split(' / ')[-1]:03}")
+            )
+        else:
+            logger.warning(f"No src tag for alt form: {pkmn_dict['Name']} {form}")
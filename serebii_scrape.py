@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 import time
 from io import BytesIO
 from pathlib import Path
 
-from typing import Tuple, List
+from typing import Callable, Dict, Iterable, Tuple, List
 
 import httpx as httpx
 from bs4 import BeautifulSoup
@@ -13,20 +19,75 @@ from PIL import Image
 
 from loguru import logger
 
+import dex_db
+import scrape_metrics
+from asset_manifest import ASSET_FOLDERS, DEFAULT_RETRY_AFTER, AssetManifest
+from dex_store import DexEntry, DexStore
+from page_snapshot import SnapshotWriter, read_index, read_pages, snapshot_path
+from progress_store import PROGRESS_FILE, ProgressStore, entry_id
+from serebii_parse import parse_pkmn_html
+from serebii_session import (
+    AsyncScraperSession,
+    TransientFetchError,
+    get_session,
+)
+from sprite_bundle import build_bundle, bundle_path
+
+
+# Both hosts are used by the site. The benchmarks point these at a local stand-in.
+SEREBII_URL = "https://serebii.net"
+SEREBII_WWW_URL = "https://www.serebii.net"
+# Regional dexes listed on the SV index page. PDex in the data file is always Paldea,
+# numbers in the others go into Dex_Numbers.
+PALDEA_DEX = "Paldea"
+SV_DEXES = (PALDEA_DEX, "Kitakami", "Blueberry")
+
 
 def get_sv_pokedex() -> List[str]:
-    pokedex_name = "Paldea Pokédex"
-    response = get_url("https://www.serebii.net/pokedex-sv/")
+    return [url for _, url in get_sv_pokedexes([PALDEA_DEX])[PALDEA_DEX]]
+
+
+def get_sv_pokedexes(
+    dexes: Iterable[str] = (PALDEA_DEX,),
+) -> Dict[str, List[Tuple[int | None, str]]]:
+    # Every dex is a <select> on the same index page, so it is fetched once for all of them.
+    # Returns (number in that dex, page url) per pokemon, from option texts like "001 Sprigatito".
+    response = get_url(f"{SEREBII_WWW_URL}/pokedex-sv/")
 
     dex_soup = BeautifulSoup(response.content.decode(response.encoding), "lxml")
-    raw_dex_list = dex_soup.find("option", string=pokedex_name).parent
-    return [
-        x["value"] for x in raw_dex_list.find_all("option") if x.text != pokedex_name
-    ]
+    pokedexes = {}
+    for dex in dexes:
+        pokedex_name = f"{dex} Pokédex"
+        dex_header = dex_soup.find("option", string=pokedex_name)
+        if dex_header is None:
+            raise ValueError(f"No {pokedex_name} on the Serebii index")
+        pokedexes[dex] = [
+            (_option_number(x.text), x["value"])
+            for x in dex_header.parent.find_all("option")
+            if x.text != pokedex_name
+        ]
+    return pokedexes
+
+
+def _option_number(text: str) -> int | None:
+    number = text.split(" ", 1)[0]
+    return int(number) if number.isdigit() else None
 
 
 def get_pkmn_page(url: str):
-    response = get_url(url)
+    # None if the page is gone for good, e.g. a 404
+    if response := get_url(url):
+        return parse_pkmn_page(response)
+
+
+def parse_pkmn_page(response: httpx.Response):
+    # Fast path: one lxml parse with compiled XPath, same output as parse_pkmn_page_soup
+    with scrape_metrics.timed("page_parse_seconds"):
+        return parse_pkmn_html(response.content.decode(response.encoding))
+
+
+def parse_pkmn_page_soup(response: httpx.Response):
+    # Original BeautifulSoup walk, kept as the reference for the XPath parser
     pkmn_dict = {}
     pkmn_soup = BeautifulSoup(response.content.decode(response.encoding), "lxml")
 
@@ -135,26 +196,12 @@ def _get_specific_form(serebii_soup, search_string) -> List[str] | None:
 
 
 def get_url(url: str) -> httpx.Response:
-    with httpx.Client(
-        event_hooks={"request": [_log_request], "response": [_log_response]}
-    ) as client:
-        response = client.get(url)
-        if response.status_code == 200:
-            return response
-
-
-def _log_request(request: httpx.Request):
-    delay = 1
-    logger.info(f"Resting for {delay} seconds to self-throttle")
-    time.sleep(delay)
-    logger.info(f"Request Event Hook: {request.method} {request.url}")
-
-
-def _log_response(response: httpx.Response):
-    request = response.request
-    logger.info(
-        f"Response event hook: {request.method} {request.url} - Status {response.status_code}"
-    )
+    # Shared pooled session, rate limited by a token bucket instead of a blind sleep.
+    # Returns None for permanent failures. Transient ones are retried by the session and
+    # raise TransientFetchError if they keep failing, so callers can defer them.
+    response = get_session().get(url)
+    if response.status_code == 200:
+        return response
 
 
 # Manual Intervention.
@@ -274,126 +321,667 @@ def _generate_form_img(form, pkmn):
     elif "female" in form.lower():
         return f"{national_dex:03}-f{file_ext}"
     else:
-        logger.debug(
-            f"Filtering forms: {[x[1] for x in pkmn['Form_to_Img'] if x[0] == form.split('+')[1]]} with form {form}"
+        # First image listed for each alt form, same as the old first-match filter
+        form_to_img = {}
+        for alt_form, img in pkmn["Form_to_Img"]:
+            form_to_img.setdefault(alt_form, img)
+        logger.debug(f"Form to Img: {form_to_img} with form {form}")
+        return form_to_img[form.split("+")[1]].split("/")[-1]
+
+
+def _get_all_forms(pkmn) -> List[str]:
+    # For perfect living dex, need each gender form (if different) and also each alt form (red flabebe, blue, etc)
+    all_forms = pkmn["Gender Forms"]
+    if pkmn["Alt Forms"]:
+        modify_all_forms = []
+        for alt_form in pkmn["Alt Forms"]:
+            logger.debug(f"DEBUG FORMS: {alt_form}")
+            # Skip any forms shown on Serebii, but not available
+            if (pkmn["Name"], alt_form) in UNAVAILABLE_IN_SV:
+                continue
+            for gender_form in pkmn["Gender Forms"]:
+                modify_all_forms.append(f"{gender_form}+{alt_form}")
+        all_forms = modify_all_forms
+    return all_forms
+
+
+def _add_pkmn_forms(store: DexStore, pkmn, dex_numbers: Dict[str, int] | None = None):
+    # Fill out an entry for each unique gender + alt form
+    for form in _get_all_forms(pkmn):
+        if (pkmn["Name"], form) in store:
+            logger.debug(f"Found duplicate {pkmn['Name']} {form}")
+            scrape_metrics.increment("forms_total", result="duplicate")
+            continue
+        scrape_metrics.increment("forms_total", result="added")
+        store.add(
+            DexEntry(
+                name=pkmn["Name"],
+                form=form,
+                pdex=pkmn["No."]["Paldea"],
+                ndex=pkmn["No."]["National"],
+                complete=False,
+                form_image=_generate_form_img(form, pkmn),
+                dex_numbers=dict(dex_numbers or {}),
+            )
         )
-        logger.debug(f"Form to Img: {pkmn['Form_to_Img']}")
-        return [x[1].split('/')[-1] for x in pkmn["Form_to_Img"] if x[0] == form.split("+")[1]][0]
-
-
-def generate_data(data_file: str | Path):
-    # Pull list of pkmn urls from serebii
-    # TODO: expose way to start from specific pkmn number, perhaps by index slice list from get_sv_pokedex?
-    list_of_pkmn_urls = [
-        f"https://serebii.net/{url}" for url in get_sv_pokedex()
-    ]  # [222:223] slice to test range
-    logger.debug(f"Found {len(list_of_pkmn_urls)} Pokemon urls")
-    for pkmn_url in list_of_pkmn_urls:
-        # process each url
-        pkmn_list = []
-        pkmn = get_pkmn_page(pkmn_url)
-        # Open/close on each url because ths is 400 requests and saving progress is nice.
-        with open(data_file, "r", encoding="windows-1252") as pkmn_json:
-            if pkmn_json:
-                pkmn_list = json.load(pkmn_json)
-        # For perfect living dex, need each gender form (if different) and also each alt form (red flabebe, blue, etc)
-        all_forms = pkmn["Gender Forms"]
-        if pkmn["Alt Forms"]:
-            modify_all_forms = []
-            for alt_form in pkmn["Alt Forms"]:
-                logger.debug(f"DEBUG FORMS: {alt_form}")
-                # Skip any forms shown on Serebii, but not available
-                if (pkmn["Name"], alt_form) in UNAVAILABLE_IN_SV:
-                    continue
-                for gender_form in pkmn["Gender Forms"]:
-                    modify_all_forms.append(f"{gender_form}+{alt_form}")
-            all_forms = modify_all_forms
-        # Fill out an entry for each unique gender + alt form
-        for form in all_forms:
-            if (pkmn["Name"], form.replace(" ", "")) not in [
-                (x["Name"], x["Form"].replace(" ", "")) for x in pkmn_list
-            ]:
-                pkmn_list.append(
-                    {
-                        "Name": pkmn["Name"],
-                        "Form": form,
-                        "PDex": pkmn["No."]["Paldea"],
-                        "NDex": pkmn["No."]["National"],
-                        "Complete": False,
-                        "Form_Image": _generate_form_img(form, pkmn),
-                    }
-                )
+
+
+def _get_sv_pokedex_index(
+    dexes: Iterable[str] = (PALDEA_DEX,),
+) -> Dict[str, Dict[str, int]]:
+    # Combined, de-duplicated page urls of all the dexes, in dex order, each with its
+    # numbers in the non-Paldea dexes. A pokemon in several dexes is still one page.
+    index = {}
+    for dex, pokedex in get_sv_pokedexes(dexes).items():
+        for number, url in pokedex:
+            dex_numbers = index.setdefault(f"{SEREBII_URL}/{url}", {})
+            if dex != PALDEA_DEX and number is not None:
+                dex_numbers[dex] = number
+    return index
+
+
+def _get_sv_pokedex_urls(dexes: Iterable[str] = (PALDEA_DEX,)) -> List[str]:
+    return list(_get_sv_pokedex_index(dexes))
+
+
+def _retry_deferred(deferred: List[tuple], retry: Callable, what: str) -> List[tuple]:
+    # Work that still failed transiently after the session's retries gets one more go at
+    # the end of the run, once Serebii has had the rest of the run to recover.
+    # Returns the items that failed again.
+    if not deferred:
+        return []
+    logger.warning(f"Retrying {len(deferred)} deferred {what}")
+    failed = []
+    for item in deferred:
+        try:
+            retry(*item)
+        except TransientFetchError as e:
+            logger.error(f"Giving up for this run on {e}")
+            scrape_metrics.increment("deferred_total", result="failed")
+            failed.append(item)
+        else:
+            scrape_metrics.increment("deferred_total", result="recovered")
+    return failed
+
+
+async def _get_responses_async(
+    urls: List[Tuple[int, str]],
+    concurrency: int,
+    on_response: Callable[[int, str, httpx.Response], None],
+) -> List[Tuple[int, str]]:
+    # Returns the (index, url) pairs that kept failing transiently, for the deferred pass.
+    # Shares the token bucket, on-disk cache, offline setting, retry policy and circuit
+    # breaker of the regular session, so the rate set with configure_session applies to
+    # both paths and the deferred pass sees the same breaker state.
+    shared = get_session()
+    async with AsyncScraperSession(
+        limiter=shared.limiter,
+        concurrency=concurrency,
+        cache=shared.cache,
+        offline=shared.offline,
+        retry=shared.retry,
+        breaker=shared.breaker,
+    ) as session:
+
+        async def fetch(index: int, url: str):
+            start = time.perf_counter()
+            try:
+                response = await session.get(url)
+            except TransientFetchError as e:
+                logger.warning(f"Deferring {e}")
+                return index, url
+            if response.status_code == 200:
+                on_response(index, url, response)
+                scrape_metrics.observe("page_seconds", time.perf_counter() - start)
             else:
-                logger.debug(f"Found duplicate {pkmn['Name']} {form}")
-        # Save file. Encoding is from Serebii webpage.
-        with open(data_file, "w", encoding="windows-1252") as pkmn_json:
-            json.dump(pkmn_list, pkmn_json, indent=2)
-    # Correct missing data
-    with open(data_file, "r", encoding="windows-1252") as pkmn_json:
-        pkmn_list = json.load(pkmn_json)
-        # Missing data on Serebii
-        for manual_added in TO_ADD:
-            if (manual_added["Name"], manual_added["Form"]) not in [
-                (x["Name"], x["Form"]) for x in pkmn_list
-            ]:
-                pkmn_list.append(manual_added)
-    with open(data_file, "w", encoding="windows-1252") as pkmn_json:
-        json.dump(pkmn_list, pkmn_json, indent=2)
-
-
-def generate_images(data_file: str | Path, img_file: str | Path):
-    pkmn_list = []
-    with open(data_file, "r", encoding="windows-1252") as pkmn_json:
-        pkmn_list = json.load(pkmn_json)
-    logger.debug(f"Starting image checking and downloading.")
-    for pkmn in pkmn_list:
-        image_file_suffix = pkmn["Form_Image"]
-
-        image_file_url = (
-            f"https://serebii.net/scarletviolet/pokemon/new/{image_file_suffix}"
-        )
-        image_file_path = f"{img_file}\\normal\\{image_file_suffix}"
-        if (
-            not Path(image_file_path).exists()
-            and not Path(f"{image_file_path}.err").exists()
+                logger.warning(f"Skipping {url}, status {response.status_code}")
+
+        results = await asyncio.gather(*[fetch(index, url) for index, url in urls])
+    return [deferred for deferred in results if deferred is not None]
+
+
+def _journal_path(data_file: str | Path) -> Path:
+    return Path(f"{data_file}.journal")
+
+
+def _read_journal(journal_file: Path) -> List[dict]:
+    # One JSON record per line: {"index": dex index, "url": page url, "pkmn": parsed page}
+    records = []
+    if journal_file.exists():
+        with open(journal_file, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Last line may be cut short if the run was killed mid-write
+                    logger.warning(f"Ignoring partial journal line in {journal_file}")
+    return records
+
+
+def _pages_path(data_file: str | Path) -> Path:
+    return Path(f"{data_file}.pages.json")
+
+
+def _read_json_file(json_file: Path) -> Dict:
+    # Side files of the data file: parsed pages {page url: parsed page}
+    # and page hashes {page url: sha256 of the body}
+    if not json_file.exists():
+        return {}
+    with open(json_file, "r", encoding="utf-8") as side_json:
+        return json.load(side_json)
+
+
+def _write_json_file(json_file: Path, contents: Dict):
+    temp_path = json_file.with_name(f"{json_file.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as side_json:
+        json.dump(contents, side_json)
+    os.replace(temp_path, json_file)
+
+
+def _compact_journal(
+    data_file: str | Path, journal_file: Path, index: Dict[str, Dict[str, int]]
+):
+    # Merge every journaled page into the data file in dex order, then write it once.
+    # Journaled pages are added to the parsed pages kept from earlier runs.
+    store = DexStore.load(data_file) if Path(data_file).exists() else DexStore()
+    pages_file = _pages_path(data_file)
+    pages = _read_json_file(pages_file)
+    for record in _read_journal(journal_file):
+        pages[record["url"]] = record["pkmn"]
+    _add_pages(store, pages, index)
+    store.save(data_file)
+    _write_json_file(pages_file, pages)
+    journal_file.unlink()
+
+
+def _add_pages(
+    store: DexStore, pages: Dict[str, dict], index: Dict[str, Dict[str, int]]
+):
+    # Parsed pages to entries, in dex order, plus the manual fixes in TO_ADD
+    numbers_by_name = {}
+    for url, dex_numbers in index.items():
+        if url in pages:
+            _add_pkmn_forms(store, pages[url], dex_numbers)
+            numbers_by_name[pages[url]["Name"]] = dex_numbers
+    # Missing data on Serebii
+    for manual_added in TO_ADD:
+        store.add(DexEntry.from_dict(manual_added))
+    # Entries from earlier runs and TO_ADD pick up numbers in newly tracked dexes too
+    for entry in store:
+        if entry.name in numbers_by_name:
+            entry.dex_numbers = {**entry.dex_numbers, **numbers_by_name[entry.name]}
+
+
+def generate_data(
+    data_file: str | Path,
+    concurrency: int | None = None,
+    resume: bool = False,
+    start_index: int = 0,
+    db_file: str | Path | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    dexes: Iterable[str] = (PALDEA_DEX,),
+    refetch: bool = False,
+    snapshot: bool = False,
+):
+    # snapshot=True also saves every raw page to <data_file>.snapshot.zip for rebuild_data.
+    # A snapshot has to hold every page, so it fetches them all and can't be resumed.
+    if snapshot and (resume or start_index):
+        raise ValueError("A snapshot needs a full run, without resume or start_index")
+    refetch = refetch or snapshot
+    # Timings and cache counters for the run end up in <data_file>.metrics.json/.prom
+    with scrape_metrics.recording(f"{data_file}.metrics"):
+        # Pull the combined list of pkmn urls of every dex in dexes from serebii,
+        # optionally starting from a specific index in that list
+        with scrape_metrics.timed("phase_seconds", phase="index"):
+            dex_index = _get_sv_pokedex_index(dexes)
+        list_of_pkmn_urls = list(enumerate(dex_index))[start_index:]
+        total = len(list_of_pkmn_urls)
+        logger.debug(f"Found {total} Pokemon urls")
+        # Pages parsed by earlier runs are kept in <data_file>.pages.json, so tracking
+        # another dex only fetches the pages that are new. refetch=True fetches them all.
+        if not refetch:
+            known = _read_json_file(_pages_path(data_file))
+            list_of_pkmn_urls = [
+                (i, url) for i, url in list_of_pkmn_urls if url not in known
+            ]
+            scrape_metrics.increment(
+                "pages_total", total - len(list_of_pkmn_urls), result="reused"
+            )
+        # Progress is saved by appending each parsed page to a journal next to the data file.
+        # resume=True keeps the journal from an interrupted run and skips pages already in it.
+        journal_file = _journal_path(data_file)
+        if resume:
+            done = {record["url"] for record in _read_journal(journal_file)}
+            list_of_pkmn_urls = [
+                (i, url) for i, url in list_of_pkmn_urls if url not in done
+            ]
+            scrape_metrics.increment("pages_total", len(done), result="resumed")
+            logger.info(f"Resuming, {len(done)} pages already in {journal_file}")
+        elif journal_file.exists():
+            journal_file.unlink()
+        snapshot_writer = None
+        if snapshot:
+            # Written out when the pages are done, thrown away if the run fails
+            snapshot_writer = SnapshotWriter(snapshot_path(data_file), dexes, dex_index)
+        with open(
+            journal_file, "a", encoding="utf-8"
+        ) as journal, snapshot_writer or nullcontext(), scrape_metrics.timed(
+            "phase_seconds", phase="pages"
         ):
-            logger.debug(f"{pkmn['Name']} checking image")
-            image_file_content = get_url(image_file_url)
-            if image_file_content:
-                image_file_pillow = Image.open(BytesIO(image_file_content.content))
-                image_file_pillow.save(image_file_path)
+
+            # progress(pages done, total pages) is called after every page, e.g. for a splash screen
+            pages_done = total - len(list_of_pkmn_urls)
+
+            def on_page(index: int, url: str, pkmn: dict):
+                nonlocal pages_done
+                journal.write(
+                    json.dumps({"index": index, "url": url, "pkmn": pkmn}) + "\n"
+                )
+                journal.flush()
+                scrape_metrics.increment("pages_total", result="fetched")
+                pages_done += 1
+                if progress is not None:
+                    progress(pages_done, total)
+
+            def on_response(index: int, url: str, response: httpx.Response):
+                if snapshot_writer is not None:
+                    snapshot_writer.add(url, response.content, response.encoding)
+                on_page(index, url, parse_pkmn_page(response))
+
+            def fetch_page(index: int, url: str):
+                if response := get_url(url):
+                    on_response(index, url, response)
+                else:
+                    logger.warning(f"Skipping {url}, could not fetch it")
+
+            if concurrency:
+                # Async mode: fetch with a bounded number of requests in flight.
+                # Pages are handed to on_response as soon as each one arrives. Compaction
+                # merges by dex index, so the output matches the sequential path.
+                deferred = asyncio.run(
+                    _get_responses_async(list_of_pkmn_urls, concurrency, on_response)
+                )
             else:
-                Path(f"{image_file_path}.err").touch(exist_ok=True)
-        else:
-            logger.debug(f"Image exists {pkmn['Name']} at {image_file_path}")
+                deferred = []
+                for index, pkmn_url in list_of_pkmn_urls:
+                    with scrape_metrics.timed("page_seconds"):
+                        try:
+                            fetch_page(index, pkmn_url)
+                        except TransientFetchError as e:
+                            logger.warning(f"Deferring {e}")
+                            deferred.append((index, pkmn_url))
+            # Pages that still fail are left out of the pages store, so the next
+            # generate_data run fetches just those
+            _retry_deferred(deferred, fetch_page, "pages")
+            if snapshot_writer is not None and len(snapshot_writer.pages) < total:
+                # rebuild_data would quietly make a shorter dex from it, keep the old one
+                logger.error(
+                    f"Not saving the snapshot, {total - len(snapshot_writer.pages)} "
+                    f"of {total} pages could not be fetched"
+                )
+                snapshot_writer.discard()
+        with scrape_metrics.timed("phase_seconds", phase="compact"):
+            _compact_journal(data_file, journal_file, dex_index)
+        if db_file is not None:
+            # Keep the SQLite catalog in step, caught flags in it are left untouched
+            with scrape_metrics.timed("phase_seconds", phase="db_sync"):
+                dex_db.sync_catalog(dex_db.connect(db_file), DexStore.load(data_file))
+
+
+def _parse_snapshot_pages(
+    snapshot_file: str | Path, pages: List[Tuple[str, str, str]]
+) -> List[Tuple[str, dict]]:
+    # Runs in a worker process: read a chunk of raw pages and parse them
+    return [
+        (url, parse_pkmn_html(html)) for url, html in read_pages(snapshot_file, pages)
+    ]
 
-        shiny_file_url = f"https://www.serebii.net/Shiny/SV/new/{image_file_suffix}"
-        shiny_file_path = f"{img_file}\\shiny\\{image_file_suffix}"
-        if (
-            not Path(shiny_file_path).exists()
-            and not Path(f"{shiny_file_path}.err").exists()
-        ):
-            shiny_file_content = get_url(shiny_file_url)
-            if shiny_file_content:
-                image_file_pillow = Image.open(BytesIO(shiny_file_content.content))
-                image_file_pillow.save(shiny_file_path)
+
+def rebuild_data(
+    data_file: str | Path,
+    snapshot_file: str | Path | None = None,
+    workers: int | None = None,
+    db_file: str | Path | None = None,
+):
+    # Re-derive the data file from a snapshot saved by generate_data(snapshot=True), with no
+    # network, e.g. after changing UNAVAILABLE_IN_SV, TO_ADD or the parser. Pages are parsed
+    # on every core. The store is built from scratch in dex order, so the result doesn't
+    # depend on which worker finished first, and matches a live scrape of the same pages.
+    snapshot_file = snapshot_file or snapshot_path(data_file)
+    workers = workers or os.cpu_count() or 1
+    with scrape_metrics.recording(f"{data_file}.metrics"):
+        snapshot_index = read_index(snapshot_file)
+        jobs = [
+            (url, page["file"], page["encoding"])
+            for url, page in snapshot_index["pages"].items()
+        ]
+        logger.info(f"Rebuilding {data_file} from {len(jobs)} pages in {snapshot_file}")
+        with scrape_metrics.timed("phase_seconds", phase="parse"):
+            # A few chunks per worker, so one slow chunk doesn't hold up the rest
+            size = max(1, -(-len(jobs) // (workers * 4)))
+            chunks = [jobs[i : i + size] for i in range(0, len(jobs), size)]
+            if workers == 1:
+                parsed = [_parse_snapshot_pages(snapshot_file, c) for c in chunks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parsed = list(
+                        pool.map(
+                            _parse_snapshot_pages, [snapshot_file] * len(chunks), chunks
+                        )
+                    )
+            # Round trip through JSON so the pages store reads back exactly as written
+            pages = json.loads(
+                json.dumps({url: pkmn for chunk in parsed for url, pkmn in chunk})
+            )
+            scrape_metrics.increment("pages_total", len(pages), result="rebuilt")
+        with scrape_metrics.timed("phase_seconds", phase="compact"):
+            store = DexStore()
+            _add_pages(store, pages, snapshot_index["index"])
+            if Path(data_file).exists():
+                # Until the progress store is seeded, the catalog holds the only caught flags
+                for entry in DexStore.load(data_file):
+                    if entry.complete and (found := store.get(entry.name, entry.form)):
+                        found.complete = True
+            store.save(data_file)
+            _write_json_file(_pages_path(data_file), pages)
+        if db_file is not None:
+            with scrape_metrics.timed("phase_seconds", phase="db_sync"):
+                dex_db.sync_catalog(dex_db.connect(db_file), store)
+        logger.info(f"Rebuilt {len(store)} entries into {data_file}")
+
+
+def _hashes_path(data_file: str | Path) -> Path:
+    return Path(f"{data_file}.hashes.json")
+
+
+def _form_entries(pkmn: dict | None, dex_numbers: Dict[str, int]) -> DexStore:
+    # Entries one parsed page turns into, the same way _compact_journal builds them
+    forms = DexStore()
+    if pkmn is not None:
+        _add_pkmn_forms(forms, pkmn, dex_numbers)
+    return forms
+
+
+def _diff_page(
+    store: DexStore,
+    old: DexStore,
+    new: DexStore,
+    progress: ProgressStore | None,
+    report: Dict[str, list],
+):
+    # Apply the difference between the old and new entries of one page to store.
+    # Complete flags of entries that stay (or are only renamed) are carried over.
+    old_keys = {entry.key: entry for entry in old}
+    new_keys = {entry.key: entry for entry in new}
+    removed = [entry for key, entry in old_keys.items() if key not in new_keys]
+    added = [entry for key, entry in new_keys.items() if key not in old_keys]
+    for entry in new:
+        current = store.get(entry.name, entry.form)
+        if entry.key not in old_keys or current is None:
+            continue
+        if current.form_image != entry.form_image:
+            report["images"].append(
+                {
+                    "name": entry.name,
+                    "form": entry.form,
+                    "old": current.form_image,
+                    "new": entry.form_image,
+                }
+            )
+            current.form_image = entry.form_image
+        current.pdex, current.ndex = entry.pdex, entry.ndex
+        current.dex_numbers = {**current.dex_numbers, **entry.dex_numbers}
+    # A removed and an added form with the same image is the same form under a new name
+    added_by_image = {entry.form_image: entry for entry in added}
+    for entry in removed:
+        current = store.get(entry.name, entry.form)
+        renamed = added_by_image.pop(entry.form_image, None)
+        if renamed is not None and current is not None:
+            added.remove(renamed)
+            renamed.complete = current.complete
+            store.replace(current, renamed)
+            if progress is not None:
+                progress.rename(entry_id(current), entry_id(renamed))
+            report["renamed"].append(
+                {"name": entry.name, "old": current.form, "new": renamed.form}
+            )
+        elif current is not None:
+            store.remove(current)
+            report["removed"].append({"name": entry.name, "form": entry.form})
+    for entry in added:
+        if store.add(entry):
+            report["added"].append(
+                {"name": entry.name, "form": entry.form, "image": entry.form_image}
+            )
+
+
+def refresh_data(
+    data_file: str | Path,
+    concurrency: int | None = None,
+    dexes: Iterable[str] = (PALDEA_DEX,),
+    db_file: str | Path | None = None,
+    progress_file: str | Path | None = PROGRESS_FILE,
+) -> Dict[str, list]:
+    # Cheap update of an existing data file, e.g. after a DLC. Every page is fetched (mostly
+    # 304s from the response cache), but only pages whose body hash changed are parsed and
+    # only the entries of pages that parse differently are touched. Returns the change report,
+    # which is also written to <data_file>.changes.json.
+    with scrape_metrics.recording(f"{data_file}.metrics"):
+        with scrape_metrics.timed("phase_seconds", phase="index"):
+            dex_index = _get_sv_pokedex_index(dexes)
+        pages_file, hashes_file = _pages_path(data_file), _hashes_path(data_file)
+        pages = _read_json_file(pages_file)
+        hashes = _read_json_file(hashes_file)
+        changed: Dict[str, dict] = {}
+
+        def on_response(index: int, url: str, response: httpx.Response):
+            digest = hashlib.sha256(response.content).hexdigest()
+            if hashes.get(url) == digest and url in pages:
+                scrape_metrics.increment("pages_total", result="unchanged")
+                return
+            hashes[url] = digest
+            # Round trip through JSON so tuples compare equal to the lists read back from disk
+            pkmn = json.loads(json.dumps(parse_pkmn_page(response)))
+            if pages.get(url) != pkmn:
+                changed[url] = pkmn
+                scrape_metrics.increment("pages_total", result="changed")
             else:
-                Path(f"{shiny_file_path}.err").touch(exist_ok=True)
+                # Body changed (ads, layout) but not the data we use
+                scrape_metrics.increment("pages_total", result="reparsed")
 
-        sprite_file_url = f"https://serebii.net/pokedex-sv/icon/new/{image_file_suffix}"
-        sprite_file_path = f"{img_file}\\sprite\\{image_file_suffix}"
-        if (
-            not Path(sprite_file_path).exists()
-            and not Path(f"{sprite_file_path}.err").exists()
-        ):
-            sprite_file_content = get_url(sprite_file_url)
-            if sprite_file_content:
-                image_file_pillow = Image.open(BytesIO(sprite_file_content.content))
-                image_file_pillow.save(sprite_file_path)
+        def fetch_response(index: int, url: str):
+            if response := get_url(url):
+                on_response(index, url, response)
             else:
-                sprite_file_content = get_url(sprite_file_url.replace("-f", ""))
-                if sprite_file_content:
-                    image_file_pillow = Image.open(BytesIO(sprite_file_content.content))
-                    image_file_pillow.save(sprite_file_path)
+                logger.warning(f"Skipping {url}, could not fetch it")
+
+        urls = list(enumerate(dex_index))
+        with scrape_metrics.timed("phase_seconds", phase="pages"):
+            if concurrency:
+                deferred = asyncio.run(
+                    _get_responses_async(urls, concurrency, on_response)
+                )
+            else:
+                deferred = []
+                for index, url in urls:
+                    try:
+                        fetch_response(index, url)
+                    except TransientFetchError as e:
+                        logger.warning(f"Deferring {e}")
+                        deferred.append((index, url))
+            # Pages that still fail keep their old hash and entries until the next refresh
+            _retry_deferred(deferred, fetch_response, "pages")
+
+        with scrape_metrics.timed("phase_seconds", phase="diff"):
+            store = DexStore.load(data_file)
+            progress = None
+            if progress_file is not None and ProgressStore(progress_file).exists():
+                progress = ProgressStore(progress_file)
+                progress.load()
+            report = {"added": [], "removed": [], "renamed": [], "images": []}
+            # In dex order, so the report and any added entries follow the dex
+            for url, dex_numbers in dex_index.items():
+                if url in changed:
+                    _diff_page(
+                        store,
+                        _form_entries(pages.get(url), dex_numbers),
+                        _form_entries(changed[url], dex_numbers),
+                        progress,
+                        report,
+                    )
+                    pages[url] = changed[url]
+            # Pokemon that dropped out of every dex being refreshed lose all their forms
+            for url in [url for url in pages if url not in dex_index]:
+                _diff_page(
+                    store,
+                    _form_entries(pages.pop(url), {}),
+                    DexStore(),
+                    progress,
+                    report,
+                )
+                hashes.pop(url, None)
+            store.save(data_file)
+            _write_json_file(pages_file, pages)
+            _write_json_file(hashes_file, hashes)
+            if progress is not None:
+                progress.flush()
+        with open(f"{data_file}.changes.json", "w", encoding="utf-8") as changes_json:
+            json.dump(report, changes_json, indent=2, ensure_ascii=False)
+        logger.info(
+            f"Refreshed {len(changed)} changed pages: "
+            + ", ".join(f"{len(items)} {kind}" for kind, items in report.items())
+        )
+        if db_file is not None:
+            with scrape_metrics.timed("phase_seconds", phase="db_sync"):
+                dex_db.sync_catalog(
+                    dex_db.connect(db_file), store, renamed=report["renamed"]
+                )
+        return report
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _save_image(content: bytes, image_file_path: Path) -> bytes:
+    # PNGs are written byte for byte, anything else is converted through Pillow like before.
+    # Written to a temp file and renamed so an interrupted sync never leaves half an image.
+    # The temp name is per thread, so two workers saving the same file can't collide.
+    if not content.startswith(PNG_SIGNATURE):
+        converted = BytesIO()
+        Image.open(BytesIO(content)).save(converted, format="PNG")
+        content = converted.getvalue()
+    temp_path = image_file_path.with_name(
+        f"{image_file_path.name}.{threading.get_ident()}.tmp"
+    )
+    with open(temp_path, "wb") as image_file:
+        image_file.write(content)
+    os.replace(temp_path, image_file_path)
+    return content
+
+
+def _download_image(
+    manifest: AssetManifest, key: str, image_file_urls: List[str], image_file_path: Path
+):
+    # Try each url in turn, e.g. the sprite without "-f" when there is no female sprite.
+    # TransientFetchError is left to the caller: the image isn't recorded as failed, since
+    # a retry soon may well work.
+    for image_file_url in image_file_urls:
+        image_file_content = get_url(image_file_url)
+        if image_file_content:
+            with scrape_metrics.timed("image_save_seconds"):
+                content = _save_image(image_file_content.content, image_file_path)
+            manifest.record_ok(key, content)
+            scrape_metrics.increment("images_total", result="ok")
+            return
+    manifest.record_failed(key)
+    scrape_metrics.increment("images_total", result="failed")
+
+
+def _image_jobs(pkmn: dict, img_file: str | Path) -> List[Tuple[str, List[str], Path]]:
+    # (manifest key, urls to try, destination) for the normal, shiny and sprite images
+    image_file_suffix = pkmn["Form_Image"]
+    sprite_file_url = f"{SEREBII_URL}/pokedex-sv/icon/new/{image_file_suffix}"
+    return [
+        (
+            f"{folder}/{image_file_suffix}",
+            image_file_urls,
+            Path(img_file) / folder / image_file_suffix,
+        )
+        for folder, image_file_urls in [
+            (
+                "normal",
+                [f"{SEREBII_URL}/scarletviolet/pokemon/new/{image_file_suffix}"],
+            ),
+            ("shiny", [f"{SEREBII_WWW_URL}/Shiny/SV/new/{image_file_suffix}"]),
+            ("sprite", [sprite_file_url, sprite_file_url.replace("-f", "")]),
+        ]
+    ]
+
+
+def generate_images(
+    data_file: str | Path,
+    img_file: str | Path,
+    workers: int | None = None,
+    retry_failed_after: float = DEFAULT_RETRY_AFTER,
+):
+    # Timings and cache counters for the run end up in <img_file>/metrics.json/.prom
+    with scrape_metrics.recording(Path(img_file) / "metrics"):
+        pkmn_list = []
+        with open(data_file, "r", encoding="windows-1252") as pkmn_json:
+            pkmn_list = json.load(pkmn_json)
+        logger.debug(f"Starting image checking and downloading.")
+        # Plan the sync against the manifest in memory, no per-file exists() probing
+        with scrape_metrics.timed("phase_seconds", phase="plan"):
+            manifest = AssetManifest.load(img_file)
+            jobs = []
+            # Form_Image repeats, e.g. every Female+<alt> form is NNN-f.png, plan each once
+            seen = set()
+            for pkmn in pkmn_list:
+                for key, image_file_urls, image_file_path in _image_jobs(
+                    pkmn, img_file
+                ):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if manifest.needs_download(key, retry_failed_after):
+                        logger.debug(f"{pkmn['Name']} checking image {key}")
+                        jobs.append((manifest, key, image_file_urls, image_file_path))
+                        scrape_metrics.increment("assets_total", result="download")
+                    else:
+                        logger.debug(f"Image known {pkmn['Name']} at {key}")
+                        scrape_metrics.increment("assets_total", result="known")
+        for folder in ASSET_FOLDERS:
+            (Path(img_file) / folder).mkdir(parents=True, exist_ok=True)
+
+        def download(job, queued: float):
+            # Time spent waiting for a free worker before the download starts
+            scrape_metrics.observe("image_queue_seconds", time.perf_counter() - queued)
+            with scrape_metrics.timed("image_seconds"):
+                try:
+                    _download_image(*job)
+                except TransientFetchError as e:
+                    logger.warning(f"Deferring {e}")
+                    return job
+
+        try:
+            with scrape_metrics.timed("phase_seconds", phase="download"):
+                if workers:
+                    # Requests still go through the shared session, so the token bucket caps the rate
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        queued = time.perf_counter()
+                        futures = [pool.submit(download, job, queued) for job in jobs]
+                        results = [future.result() for future in futures]
                 else:
-                    Path(f"{sprite_file_path}.err").touch(exist_ok=True)
+                    results = [download(job, time.perf_counter()) for job in jobs]
+                # Images that still fail stay out of the manifest, so the next run tries again
+                _retry_deferred(
+                    [job for job in results if job is not None],
+                    _download_image,
+                    "images",
+                )
+        finally:
+            manifest.flush()
+        # Repack the GUI's sprite bundle when anything was downloaded
+        if jobs or not bundle_path(img_file).exists():
+            with scrape_metrics.timed("phase_seconds", phase="bundle"):
+                build_bundle(img_file)
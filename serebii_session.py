@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx as httpx
+from loguru import logger
+
+import scrape_metrics
+from serebii_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_BYTES,
+    ResponseCache,
+)
+
+
+# Default politeness budget towards Serebii: one request per second, no bursting.
+# Matches the old fixed one-second sleep, but time spent on the request itself now counts.
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 1
+# Worth trying again: rate limited, server trouble, gateway timeouts. Other 4xx are final.
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class TransientFetchError(Exception):
+    # A request that still failed with a transient error after every retry.
+    # Callers put the item on their deferred queue instead of giving up on it.
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    # Exponential backoff: base, 2 * base, 4 * base ... capped at max_delay, plus jitter
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    # Longest Retry-After we are willing to sleep for
+    max_retry_after: float = 300.0
+
+    def delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        backoff = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        backoff *= random.uniform(1.0, 1.25)
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return max(backoff, min(retry_after, self.max_retry_after))
+        return backoff
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    # Retry-After is either a number of seconds or an HTTP date
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    # Stops sending requests for `cooldown` seconds after `threshold` transient failures in
+    # a row, so a struggling Serebii isn't hammered by every worker at once. After the
+    # cooldown requests go out again, one more failure opens it straight back up.
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                # Half open: the next failure after the cooldown reopens it
+                self._failures = self.threshold - 1
+                logger.warning(f"Circuit open, pausing requests for {self.cooldown}s")
+                scrape_metrics.increment("circuit_open_total")
+
+
+class TokenBucket:
+    # Classic token bucket. Tokens refill at `rate` per second up to `burst`.
+    # Each request takes one token, waiting only as long as needed for the next one.
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self) -> float:
+        # Take a token and return how long the caller must wait before using it.
+        # Reserving under the lock keeps threads from racing for the same token.
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        delay = self.reserve()
+        if delay > 0:
+            logger.info(f"Resting for {delay:.2f} seconds to self-throttle")
+            time.sleep(delay)
+        return delay
+
+
+class ScraperSession:
+    # Long-lived client so every request to Serebii reuses pooled keep-alive connections
+    # instead of paying a new TCP+TLS handshake per page/image.
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_connections: int = 10,
+        timeout: float = 30.0,
+        cache: ResponseCache | None = None,
+        offline: bool = False,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.limiter = TokenBucket(rate, burst)
+        self.cache = cache
+        self.offline = offline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            follow_redirects=True,
+            event_hooks={"request": [_log_request], "response": [_log_response]},
+        )
+
+    def get(self, url: str) -> httpx.Response:
+        # Transient failures are retried with backoff, and raise TransientFetchError once
+        # the attempts run out. Anything else, e.g. a 404, is returned to the caller.
+        entry = _cached_entry(self.cache, url)
+        if cached := _serve_cached(self.cache, url, entry, self.offline):
+            return cached
+        for attempt in range(1, self.retry.max_attempts + 1):
+            if paused := self.breaker.wait_time():
+                time.sleep(paused)
+            scrape_metrics.observe("request_throttle_seconds", self.limiter.acquire())
+            start = time.perf_counter()
+            try:
+                response = self.client.get(
+                    url, headers=_conditional_headers(self.cache, entry)
+                )
+            except httpx.TransportError as e:
+                response, reason = None, f"{type(e).__name__}: {e}"
+            else:
+                _record_response(response, time.perf_counter() - start)
+                if response.status_code not in TRANSIENT_STATUSES:
+                    self.breaker.record_success()
+                    return _revalidated(self.cache, url, entry, response)
+                reason = f"status {response.status_code}"
+            self.breaker.record_failure()
+            if attempt < self.retry.max_attempts:
+                delay = self.retry.delay(attempt, response)
+                _log_retry(url, reason, attempt, delay)
+                time.sleep(delay)
+        raise TransientFetchError(url, reason)
+
+    def close(self):
+        self.client.close()
+        if self.cache is not None:
+            self.cache.flush()
+
+    def __enter__(self) -> ScraperSession:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncScraperSession:
+    # Async counterpart of ScraperSession. At most `concurrency` requests are in flight,
+    # and all of them share one token bucket so the overall request rate stays capped.
+    # Pass limiter to share an existing bucket, e.g. the one of the shared session.
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        concurrency: int = 4,
+        timeout: float = 30.0,
+        cache: ResponseCache | None = None,
+        offline: bool = False,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        limiter: TokenBucket | None = None,
+    ):
+        self.limiter = limiter or TokenBucket(rate, burst)
+        self.cache = cache
+        self.offline = offline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+            ),
+            timeout=timeout,
+            follow_redirects=True,
+            event_hooks={
+                "request": [_async_log_request],
+                "response": [_async_log_response],
+            },
+        )
+
+    async def get(self, url: str) -> httpx.Response:
+        entry = _cached_entry(self.cache, url)
+        if cached := _serve_cached(self.cache, url, entry, self.offline):
+            return cached
+        for attempt in range(1, self.retry.max_attempts + 1):
+            queued = time.perf_counter()
+            async with self._semaphore:
+                scrape_metrics.observe(
+                    "request_queue_seconds", time.perf_counter() - queued
+                )
+                if paused := self.breaker.wait_time():
+                    await asyncio.sleep(paused)
+                delay = self.limiter.reserve()
+                scrape_metrics.observe("request_throttle_seconds", delay)
+                if delay > 0:
+                    logger.debug(f"Resting for {delay:.2f} seconds to self-throttle")
+                    await asyncio.sleep(delay)
+                start = time.perf_counter()
+                try:
+                    response = await self.client.get(
+                        url, headers=_conditional_headers(self.cache, entry)
+                    )
+                except httpx.TransportError as e:
+                    response, reason = None, f"{type(e).__name__}: {e}"
+                else:
+                    _record_response(response, time.perf_counter() - start)
+                    if response.status_code not in TRANSIENT_STATUSES:
+                        self.breaker.record_success()
+                        return _revalidated(self.cache, url, entry, response)
+                    reason = f"status {response.status_code}"
+            # Back off outside the semaphore so other requests can use the slot
+            self.breaker.record_failure()
+            if attempt < self.retry.max_attempts:
+                delay = self.retry.delay(attempt, response)
+                _log_retry(url, reason, attempt, delay)
+                await asyncio.sleep(delay)
+        raise TransientFetchError(url, reason)
+
+    async def aclose(self):
+        await self.client.aclose()
+        if self.cache is not None:
+            self.cache.flush()
+
+    async def __aenter__(self) -> AsyncScraperSession:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+def _cached_entry(cache: ResponseCache | None, url: str) -> dict | None:
+    return cache.lookup(url) if cache is not None else None
+
+
+def _conditional_headers(cache: ResponseCache | None, entry: dict | None) -> dict:
+    return cache.conditional_headers(entry) if cache is not None else {}
+
+
+def _serve_cached(
+    cache: ResponseCache | None, url: str, entry: dict | None, offline: bool
+) -> httpx.Response | None:
+    # Answer from disk without touching the network when the copy is fresh enough,
+    # or whenever offline mode is on. Offline misses get a 504 like a gateway would.
+    if entry is not None and (offline or cache.is_fresh(entry)):
+        logger.debug(f"Cache hit {url}")
+        scrape_metrics.increment("http_cache_total", result="hit")
+        return cache.to_response(url, entry)
+    if offline:
+        logger.warning(f"Offline and not cached: {url}")
+        scrape_metrics.increment("http_cache_total", result="offline_miss")
+        return httpx.Response(504, request=httpx.Request("GET", url))
+    return None
+
+
+def _revalidated(
+    cache: ResponseCache | None, url: str, entry: dict | None, response: httpx.Response
+) -> httpx.Response:
+    if cache is None:
+        return response
+    if response.status_code == 304 and entry is not None:
+        logger.debug(f"Not modified, using cached {url}")
+        scrape_metrics.increment("http_cache_total", result="not_modified")
+        cache.touch(url)
+        return cache.to_response(url, entry)
+    scrape_metrics.increment("http_cache_total", result="miss")
+    if response.status_code == 200:
+        cache.store(url, response)
+    return response
+
+
+def _log_retry(url: str, reason: str, attempt: int, delay: float):
+    logger.warning(
+        f"{url} failed ({reason}), attempt {attempt}, retrying in {delay:.1f}s"
+    )
+    scrape_metrics.increment("retries_total")
+
+
+def _record_response(response: httpx.Response, network_seconds: float):
+    # Time on the wire for requests that actually went out, cache hits never get here
+    scrape_metrics.observe("request_network_seconds", network_seconds)
+    scrape_metrics.observe("response_bytes", len(response.content))
+    scrape_metrics.increment("requests_total", status=response.status_code)
+
+
+def _log_request(request: httpx.Request):
+    logger.info(f"Request Event Hook: {request.method} {request.url}")
+
+
+def _log_response(response: httpx.Response):
+    request = response.request
+    logger.info(
+        f"Response event hook: {request.method} {request.url} - Status {response.status_code}"
+    )
+
+
+async def _async_log_request(request: httpx.Request):
+    _log_request(request)
+
+
+async def _async_log_response(response: httpx.Response):
+    _log_response(response)
+
+
+_session: ScraperSession | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> ScraperSession:
+    # Shared session, created on first use so importing the scraper stays cheap.
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = ScraperSession(cache=ResponseCache())
+        return _session
+
+
+def configure_session(
+    rate: float = DEFAULT_RATE,
+    burst: int = DEFAULT_BURST,
+    cache_dir: str | Path | None = DEFAULT_CACHE_DIR,
+    max_age: float = DEFAULT_MAX_AGE,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    offline: bool = False,
+    **client_options,
+) -> ScraperSession:
+    # Replace the shared session, e.g. to loosen the rate limit for a local mirror.
+    # cache_dir=None turns the on-disk cache off, offline=True never touches the network.
+    global _session
+    with _session_lock:
+        # Close first so the old session flushes its cache index before we read it back
+        if _session is not None:
+            _session.close()
+        cache = None
+        if cache_dir is not None:
+            cache = ResponseCache(cache_dir, max_age=max_age, max_bytes=max_bytes)
+        _session = ScraperSession(
+            rate=rate, burst=burst, cache=cache, offline=offline, **client_options
+        )
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
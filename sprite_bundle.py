@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from loguru import logger
+
+from asset_manifest import ASSET_FOLDERS, MANIFEST_NAME, AssetManifest
+
+
+BUNDLE_NAME = "sprites.bundle"
+# Magic, then the offset and length of the JSON index at the end of the file
+_MAGIC = b"DEXSPR01"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def bundle_path(img_file: str | Path) -> Path:
+    return Path(img_file) / BUNDLE_NAME
+
+
+def build_bundle(
+    img_file: str | Path, folders: Iterable[str] = ASSET_FOLDERS
+) -> Tuple[Path, int]:
+    # Pack every downloaded image in the manifest into <img_file>/sprites.bundle, keyed like
+    # the manifest ("sprite/025.png"). Returns the bundle path and the number of images.
+    manifest = AssetManifest.load(img_file)
+    keys = sorted(
+        key
+        for key, asset in manifest.assets.items()
+        if asset["status"] == "ok" and key.split("/", 1)[0] in folders
+    )
+    path = bundle_path(img_file)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    index: Dict[str, Tuple[int, int]] = {}
+    with open(temp_path, "wb") as bundle:
+        bundle.write(bytes(_HEADER.size))
+        for key in keys:
+            image_path = Path(img_file) / key
+            if not image_path.exists():
+                logger.warning(f"{key} is in the manifest but not on disk, skipping it")
+                continue
+            with open(image_path, "rb") as image:
+                content = image.read()
+            index[key] = (bundle.tell(), len(content))
+            bundle.write(content)
+        index_offset = bundle.tell()
+        index_json = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        bundle.write(index_json)
+        bundle.seek(0)
+        bundle.write(_HEADER.pack(_MAGIC, index_offset, len(index_json)))
+    os.replace(temp_path, path)
+    logger.info(f"Packed {len(index)} images into {path}")
+    return path, len(index)
+
+
+class SpriteBundle:
+    # Read side of the bundle: one open and one mmap for every image, instead of a file open
+    # per sprite. get() slices the mapping without copying, the OS pages in only what's used.
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as bundle:
+            self._map = mmap.mmap(bundle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a sprite bundle")
+        self.index: Dict[str, Tuple[int, int]] = json.loads(
+            self._map[index_offset : index_offset + index_length]
+        )
+        self._view = memoryview(self._map)
+
+    @classmethod
+    def open(cls, img_file: str | Path) -> SpriteBundle | None:
+        # None if there is no bundle yet, or it is older than the manifest, i.e. images were
+        # downloaded since it was built. Callers then read the loose files instead.
+        path = bundle_path(img_file)
+        if not path.exists():
+            return None
+        manifest_path = Path(img_file) / MANIFEST_NAME
+        if (
+            manifest_path.exists()
+            and manifest_path.stat().st_mtime > path.stat().st_mtime
+        ):
+            logger.warning(f"{path} is older than {manifest_path}, not using it")
+            return None
+        return cls(path)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, key: str) -> memoryview | None:
+        if key not in self.index:
+            return None
+        offset, length = self.index[key]
+        return self._view[offset : offset + length]
+
+    def close(self):
+        self._view.release()
+        self._map.close()
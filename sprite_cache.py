@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+from loguru import logger
+
+
+DEFAULT_CACHE_DIR = "data/sprite_cache"
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_BYTES = 128 * 1024 * 1024
+
+Resize = Optional[Tuple[int, int]]
+
+
+class BytesLRU:
+    # In-memory LRU of bytes values, bounded by their total size. Safe to use from threads.
+    # Always keeps the newest value, even one bigger than max_bytes on its own.
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SpriteCache:
+    # Display-ready PNG bytes for the GUI, so Pillow only opens/resizes/encodes an image once.
+    # Keyed by path, mtime and target size: an in-process LRU in front of a directory of
+    # pre-rendered files that survives restarts. Both layers are bounded in bytes.
+    def __init__(
+        self,
+        render: Callable[[str, Resize], bytes],
+        cache_dir: str | Path = DEFAULT_CACHE_DIR,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+    ):
+        self.render = render
+        self.cache_dir = Path(cache_dir)
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = BytesLRU(max_memory_bytes)
+
+    def _key(self, path: str, resize: Resize) -> str:
+        stat = os.stat(path)
+        raw = f"{Path(path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{resize}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path: str, resize: Resize = None) -> bytes:
+        key = self._key(path, resize)
+        if (data := self._memory.get(key)) is not None:
+            return data
+        disk_path = self.cache_dir / f"{key}.png"
+        if disk_path.exists():
+            with open(disk_path, "rb") as cached:
+                data = cached.read()
+        else:
+            data = self.render(path, resize)
+            self._write(disk_path, data)
+        self._memory.put(key, data)
+        return data
+
+    def _write(self, disk_path: Path, data: bytes):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = disk_path.with_name(f"{disk_path.name}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as cached:
+            cached.write(data)
+        os.replace(temp_path, disk_path)
+
+    def prune(self):
+        # Keep the disk layer under max_disk_bytes, dropping the least recently written files.
+        # Entries for old mtimes/sizes are never hit again, so they age out here.
+        if not self.cache_dir.is_dir():
+            return
+        with os.scandir(self.cache_dir) as found:
+            files = sorted(
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in found
+                if entry.name.endswith(".png")
+            )
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def warm(self, paths: Iterable[str], resize: Resize = None) -> threading.Thread:
+        # Render/load every path off the GUI thread, so the windows find them already in memory
+        def run():
+            for path in paths:
+                try:
+                    self.get(path, resize)
+                except OSError as e:
+                    logger.warning(f"Could not warm sprite cache for {path}: {e}")
+            self.prune()
+
+        thread = threading.Thread(target=run, name="sprite-cache-warm", daemon=True)
+        thread.start()
+        return thread
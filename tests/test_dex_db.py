@@ -0,0 +1,37 @@
+import dex_db
+from dex_store import DexEntry, DexStore
+
+
+def _store(*entries) -> DexStore:
+    return DexStore(
+        DexEntry(name, form, pdex, pdex + 911, False, image, {})
+        for name, form, pdex, image in entries
+    )
+
+
+def test_sync_catalog_follows_renames_and_removals(tmp_path):
+    conn = dex_db.connect(tmp_path / "dex.sqlite3")
+    dex_db.sync_catalog(
+        conn,
+        _store(
+            ("Sprigatito", "Uniform", 1, "906.png"),
+            ("Lechonk", "Male", 4, "915.png"),
+            ("Lechonk", "Female", 4, "915-f.png"),
+        ),
+    )
+    progress = dex_db.SqliteProgress(conn)
+    for entry in dex_db.load_store(conn):
+        entry.complete = True
+        progress.record(entry)
+
+    dex_db.sync_catalog(
+        conn,
+        _store(("Lechonk", "Boar", 4, "915.png")),
+        renamed=[{"name": "Lechonk", "old": "Male", "new": "Boar"}],
+    )
+    assert [(e.name, e.form, e.complete) for e in dex_db.load_store(conn)] == [
+        ("Lechonk", "Boar", True)
+    ]
+    assert conn.execute("SELECT name FROM species").fetchall() == [("Lechonk",)]
+    assert conn.execute("SELECT COUNT(*) FROM completion").fetchone() == (1,)
+    assert conn.execute("SELECT COUNT(*) FROM image_assets").fetchone() == (3,)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from serebii_parse import parse_pkmn_html
+from serebii_scrape import parse_pkmn_page, parse_pkmn_page_soup
+
+
+# Trimmed Serebii SV dex pages: the Name/No./Gender Ratio table, Alternate Forms and
+# Gender Differences tables as the site lays them out, plus unrelated fooevo/pkmn markup
+FIXTURES = Path(__file__).parent / "fixtures" / "serebii"
+PAGES = sorted(FIXTURES.glob("*.html"))
+
+
+def _response(page: Path) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=page.read_bytes(),
+        headers={"content-type": "text/html; charset=utf-8"},
+    )
+
+
+@pytest.mark.parametrize("page", PAGES, ids=[page.stem for page in PAGES])
+def test_xpath_parser_matches_soup_parser(page):
+    expected = parse_pkmn_page_soup(_response(page))
+    assert parse_pkmn_html(page.read_text(encoding="utf-8")) == expected
+    assert parse_pkmn_page(_response(page)) == expected
+
+
+def test_fixtures_cover_forms():
+    pikachu = parse_pkmn_html((FIXTURES / "pikachu.html").read_text(encoding="utf-8"))
+    assert pikachu["No."] == {"Paldea": 74, "National": 25}
+    assert pikachu["Gender Forms"] == ["Male", "Female"]
+    assert len(pikachu["Alt Forms"]) == 8
+    assert len(pikachu["Form_to_Img"]) == 8
+
+    tauros = parse_pkmn_html((FIXTURES / "tauros.html").read_text(encoding="utf-8"))
+    assert "Paldean FormCombat Breed" in tauros["Alt Forms"]
+    # Aqua Breed's image alt has a space the form name doesn't, so it has no image
+    assert len(tauros["Form_to_Img"]) == len(tauros["Alt Forms"]) - 1
+
+    sprigatito = parse_pkmn_html(
+        (FIXTURES / "sprigatito.html").read_text(encoding="utf-8")
+    )
+    assert sprigatito["Gender Forms"] == ["Uniform"]
+    assert sprigatito["Alt Forms"] is None
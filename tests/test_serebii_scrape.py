@@ -0,0 +1,130 @@
+from pathlib import Path
+
+from dex_store import DexEntry, DexStore
+from page_snapshot import SnapshotWriter
+from progress_store import ProgressStore, entry_id
+from serebii_scrape import _diff_page, rebuild_data
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "serebii"
+PAGES = {
+    f"https://serebii.net/pokedex-sv/{page.stem}/": page
+    for page in sorted(FIXTURES.glob("*.html"))
+}
+
+
+def _write_snapshot(snapshot_file: Path):
+    with SnapshotWriter(
+        snapshot_file, ["paldea"], {url: {} for url in PAGES}
+    ) as writer:
+        for url, page in PAGES.items():
+            writer.add(url, page.read_bytes(), "utf-8")
+
+
+def test_rebuild_keeps_caught_flags(tmp_path):
+    data_file, snapshot_file = tmp_path / "dex.json", tmp_path / "dex.json.snapshot.zip"
+    _write_snapshot(snapshot_file)
+    rebuild_data(data_file, snapshot_file, workers=1)
+    catalog = DexStore.load(data_file)
+    caught = [entry.key for entry in catalog][::3]
+    for key in caught:
+        catalog.get(*key).complete = True
+    catalog.save(data_file)
+
+    rebuild_data(data_file, snapshot_file, workers=1)
+    rebuilt = DexStore.load(data_file)
+    assert len(rebuilt) == len(catalog)
+    assert [entry.key for entry in rebuilt if entry.complete] == caught
+
+
+def _lechonk(*forms) -> DexStore:
+    # forms are (form, form_image) pairs of one small page
+    return DexStore(
+        DexEntry("Lechonk", form, 4, 915, False, image, {}) for form, image in forms
+    )
+
+
+def _empty_report() -> dict:
+    return {"added": [], "removed": [], "renamed": [], "images": []}
+
+
+def _caught_store(tmp_path, *forms):
+    store = _lechonk(*forms)
+    for entry in store:
+        entry.complete = True
+    progress = ProgressStore(tmp_path / "progress.json")
+    progress.seed(store)
+    return store, progress
+
+
+def test_diff_page_unchanged_keeps_complete(tmp_path):
+    forms = [("Male", "915.png"), ("Female", "915-f.png")]
+    store, progress = _caught_store(tmp_path, *forms)
+    report = _empty_report()
+    _diff_page(store, _lechonk(*forms), _lechonk(*forms), progress, report)
+    assert report == _empty_report()
+    assert [entry.complete for entry in store] == [True, True]
+
+
+def test_diff_page_new_image_keeps_complete(tmp_path):
+    store, progress = _caught_store(tmp_path, ("Male", "915.png"))
+    report = _empty_report()
+    _diff_page(
+        store,
+        _lechonk(("Male", "915.png")),
+        _lechonk(("Male", "915-m.png")),
+        progress,
+        report,
+    )
+    assert store.get("Lechonk", "Male").form_image == "915-m.png"
+    assert store.get("Lechonk", "Male").complete
+    assert report["images"] == [
+        {"name": "Lechonk", "form": "Male", "old": "915.png", "new": "915-m.png"}
+    ]
+
+
+def test_diff_page_rename_carries_progress(tmp_path):
+    store, progress = _caught_store(
+        tmp_path, ("Male", "915.png"), ("Female", "915-f.png")
+    )
+    report = _empty_report()
+    _diff_page(
+        store,
+        _lechonk(("Male", "915.png"), ("Female", "915-f.png")),
+        _lechonk(("Boar", "915.png"), ("Female", "915-f.png")),
+        progress,
+        report,
+    )
+    progress.flush()
+    assert report["renamed"] == [{"name": "Lechonk", "old": "Male", "new": "Boar"}]
+    assert report["added"] == report["removed"] == []
+    # Renamed in place, so it keeps its spot in the order
+    assert [entry.form for entry in store] == ["Boar", "Female"]
+    assert store.get("Lechonk", "Boar").complete
+    reloaded = ProgressStore(tmp_path / "progress.json")
+    reloaded.load()
+    assert reloaded.complete == {
+        entry_id(store.get("Lechonk", "Boar")),
+        entry_id(store.get("Lechonk", "Female")),
+    }
+
+
+def test_diff_page_removes_and_adds(tmp_path):
+    store, progress = _caught_store(
+        tmp_path, ("Male", "915.png"), ("Female", "915-f.png")
+    )
+    report = _empty_report()
+    _diff_page(
+        store,
+        _lechonk(("Male", "915.png"), ("Female", "915-f.png")),
+        _lechonk(("Male", "915.png"), ("Shiny", "915-s.png")),
+        progress,
+        report,
+    )
+    assert store.get("Lechonk", "Female") is None
+    assert not store.get("Lechonk", "Shiny").complete
+    assert store.get("Lechonk", "Male").complete
+    assert report["removed"] == [{"name": "Lechonk", "form": "Female"}]
+    assert report["added"] == [
+        {"name": "Lechonk", "form": "Shiny", "image": "915-s.png"}
+    ]
@@ -1,74 +1,199 @@
 import base64
 import io
 import json
+import queue
+import threading
 from pathlib import Path
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
 import PIL.Image
 import PySimpleGUI as sg
 from loguru import logger
 
-from serebii_scrape import generate_data
+from box_layout import DEFAULT_LAYOUT, LAYOUTS, PositionTable, load_evolution_lines
+from dex_store import DexStore
+from progress_store import ProgressStore
+from sprite_bundle import SpriteBundle
+from sprite_cache import BytesLRU, SpriteCache
 
 
+# Importing this module only defines things. main() runs the startup stages:
+# load_settings, first_run_scrape (only without a dex file), load_dex, then the windows.
 JSON_FILE = "data/dex_with_img.json"
-if not Path(JSON_FILE).exists():
-    with open(JSON_FILE, "w", encoding="windows-1252") as pkmn_json:
-        json.dump([], pkmn_json, indent=2)
-    generate_data(JSON_FILE)
-
-sg.theme("Dark Green 7")
+SETTINGS_FILE = "data/settings.json"
+# Downloaded images, in normal/, shiny/ and sprite/ folders plus the packed sprites.bundle
+IMG_DIR = "images"
+STARTING_PC_BOX = 1
+# "full" makes row widgets for every entry, "paged" reuses PAGE_SIZE rows for any dex size
+LIST_MODE = "full"
+LIST_MODES = ["full", "paged"]
+PAGE_SIZE = 40
+# Seconds between background saves of caught flags, 0 turns autosave off
+AUTOSAVE_SECONDS = 0
+# "json" keeps the catalog and progress files, "sqlite" keeps both in DB_FILE
+STORAGE = "json"
+# Box layout policy from box_layout.LAYOUTS, e.g. "national" or "paldea-species-box"
+LAYOUT = DEFAULT_LAYOUT
+# Regional dexes scraped on first run, e.g. ["Paldea", "Kitakami", "Blueberry"]
+DEXES = ["Paldea"]
 
-pkmn_dex = []
 pkmn_rows = []
-with open(JSON_FILE, "r", encoding="windows-1252") as pkmn_json:
-    pkmn_dex = json.load(pkmn_json)
-    pkmn_dex = sorted(pkmn_dex, key=lambda d: d["PDex"])
+# Filled in by load_dex
+pkmn_dex = DexStore()
+progress = None
+# Slot of every pkmn_dex entry under LAYOUT, shared by the checklist and the boxes window
+positions = PositionTable.build(pkmn_dex)
 
 
-SETTINGS_FILE = "data/settings.json"
-STARTING_PC_BOX = 1
-if Path(SETTINGS_FILE).exists():
-    with open(SETTINGS_FILE, "r") as settings_json:
-        settings = json.load(settings_json)
-        STARTING_PC_BOX = settings["-BOXOFFSET-"]
+def load_settings():
+    global STARTING_PC_BOX, LIST_MODE, AUTOSAVE_SECONDS, STORAGE, DEXES, LAYOUT
+    if Path(SETTINGS_FILE).exists():
+        with open(SETTINGS_FILE, "r") as settings_json:
+            settings = json.load(settings_json)
+            STARTING_PC_BOX = settings["-BOXOFFSET-"]
+            LIST_MODE = settings.get("-LISTMODE-", LIST_MODE)
+            AUTOSAVE_SECONDS = settings.get("-AUTOSAVE-", AUTOSAVE_SECONDS)
+            STORAGE = settings.get("-STORAGE-", STORAGE)
+            DEXES = settings.get("-DEXES-", DEXES)
+            LAYOUT = settings.get("-LAYOUT-", LAYOUT)
+
+
+def load_dex():
+    global pkmn_dex, progress
+    if STORAGE == "sqlite":
+        # Only the sqlite mode pays for importing the database module
+        import dex_db
+
+        # Catalog and caught flags in one database, imported from the JSON files on first use
+        dex_db_conn = dex_db.connect()
+        if dex_db.is_empty(dex_db_conn):
+            json_progress = ProgressStore()
+            if json_progress.exists():
+                json_progress.load()
+            else:
+                json_progress = None
+            dex_db.import_json(dex_db_conn, JSON_FILE, json_progress)
+        pkmn_dex = dex_db.load_store(dex_db_conn)
+        progress = dex_db.SqliteProgress(dex_db_conn)
+    else:
+        pkmn_dex = DexStore.load(JSON_FILE)
+        # Caught flags live in their own store, the scraped catalog above is only read
+        progress = ProgressStore()
+        if progress.exists():
+            progress.load()
+        else:
+            progress.seed(pkmn_dex)
+        progress.apply_to(pkmn_dex)
+    build_positions()
+
+
+def build_positions() -> PositionTable:
+    # Sorts pkmn_dex into LAYOUT's order and lays it out in one pass. Returns the old table.
+    global positions
+    previous = positions
+    positions = PositionTable.build(pkmn_dex, LAYOUTS[LAYOUT], load_evolution_lines())
+    return previous
+
+
+def first_run_scrape() -> bool:
+    # No dex yet: scrape Serebii on a worker thread while a splash window shows progress.
+    # Returns False if the splash was closed or the scrape failed. The scrape journal is
+    # resumed on the next launch, so closing early doesn't lose the pages fetched so far.
+    from serebii_scrape import generate_data
+
+    splash = sg.Window(
+        "Perfect Living Dex",
+        [
+            [sg.Text("Downloading the dex from Serebii, this only happens once.")],
+            [sg.ProgressBar(max_value=1, key="-SCRAPE-", size=(40, 10), style="clam")],
+            [sg.Text("Starting", key="-SCRAPE-TEXT-", size=(20, 1))],
+        ],
+        finalize=True,
+    )
+
+    def scrape():
+        try:
+            generate_data(
+                JSON_FILE,
+                resume=True,
+                dexes=DEXES,
+                progress=lambda done, total: splash.write_event_value(
+                    "-SCRAPE-PROGRESS-", (done, total)
+                ),
+            )
+            splash.write_event_value("-SCRAPE-DONE-", None)
+        except Exception as e:
+            splash.write_event_value("-SCRAPE-DONE-", e)
+
+    threading.Thread(target=scrape, name="first-run-scrape", daemon=True).start()
+    finished = False
+    while True:
+        event, values = splash.read()
+        if event == "-SCRAPE-PROGRESS-":
+            done, total = values[event]
+            splash["-SCRAPE-"].update(current_count=done, max=total)
+            splash["-SCRAPE-TEXT-"].update(f"{done}/{total} pages")
+        elif event == "-SCRAPE-DONE-":
+            if values[event] is not None:
+                logger.exception(values[event])
+                sg.popup_error(f"Could not download the dex: {values[event]}")
+            finished = values[event] is None
+            break
+        elif event == sg.WIN_CLOSED:
+            break
+    splash.close()
+    return finished
 
 
 def calculate_box_row_pos(count: int) -> Tuple[int, int, int]:
-    # floor value of division, then + 1 because PC boxes aren't 0-index
-    box = count // 30 + STARTING_PC_BOX
-    # Find position inside box
-    _box_index = count % 30
-    # Row finds how many times 6 goes into index rounded down to find row number 0 index. Then 1 index answer.
-    row = _box_index // 6 + 1
-    # Pos uses modulo to count 0 to 5 then start over 0 to 5 to find column in pc box. Then 1 index answer.
-    pos = _box_index % 6 + 1
+    # Precomputed slot plus the current offset, nothing is laid out again here
+    return positions.position(count, STARTING_PC_BOX)
 
-    return box, row, pos
+
+def describe_pkmn(pkmn) -> str:
+    # Make string description of form nicer to read
+    current_form = pkmn.form.replace("Uniform", "Uni").split("+")
+    # Pokemon outside the Paldea dex have no Paldea number
+    pdex = "-" if pkmn.pdex is None else pkmn.pdex
+    return f"{pdex} / {pkmn.ndex} - {pkmn.name} - {' '.join(current_form)}"
+
+
+def describe_position(count: int) -> str:
+    box, row, pos = calculate_box_row_pos(count)
+    return f"Box {box:02}, Row {row:02}, Position {pos:02}"
+
+
+# Position label currently shown per -POSITION- key, so offset changes only touch labels that differ
+shown_positions: Dict[str, str] = {}
 
 
 def generate_pkmn_rows() -> List[sg.Element]:
+    pkmn_rows.clear()
+    if LIST_MODE == "paged":
+        return generate_pkmn_page_rows()
     for count, pkmn in enumerate(pkmn_dex):
-        # Make string description of form nicer to read
-        current_form = pkmn["Form"].replace("Uniform", "Uni").split("+")
         background_color = sg.DEFAULT_BACKGROUND_COLOR
         if count % 2 == 0:
             background_color = "dark slate gray"
-        box, row, pos = calculate_box_row_pos(count)
         pkmn_rows.append(
             [
                 sg.Checkbox(
                     "Caught?",
-                    default=pkmn["Complete"],
+                    default=pkmn.complete,
+                    enable_events=True,
                     background_color=background_color,
+                    key=count,
                 ),
                 sg.Text(
-                    f"{pkmn['PDex']} / {pkmn['NDex']} - {pkmn['Name']} - {' '.join(current_form)}",
+                    describe_pkmn(pkmn),
                     background_color=background_color,
+                    key=f"-NAME-{count}-",
                 ),
                 sg.Push(background_color=background_color),
                 sg.Text(
-                    f"Box {box:02}, Row {row:02}, Position {pos:02}",
+                    shown_positions.setdefault(
+                        f"-POSITION-{count}-", describe_position(count)
+                    ),
                     background_color=background_color,
                     key=f"-POSITION-{count}-",
                 ),
@@ -93,13 +218,133 @@ def generate_pkmn_rows() -> List[sg.Element]:
     ]
 
 
-list_pkmn = generate_pkmn_rows()
+def generate_pkmn_page_rows() -> List[sg.Element]:
+    # Fixed pool of PAGE_SIZE rows. bind_page points them at a slice of pkmn_dex, so the
+    # number of Tk widgets doesn't grow with the dex. Checkbox state lives in pkmn_dex.
+    for slot in range(PAGE_SIZE):
+        background_color = sg.DEFAULT_BACKGROUND_COLOR
+        if slot % 2 == 0:
+            background_color = "dark slate gray"
+        pkmn_rows.append(
+            [
+                sg.Checkbox(
+                    "Caught?",
+                    enable_events=True,
+                    background_color=background_color,
+                    key=f"-CHECK-{slot}-",
+                ),
+                sg.Text(
+                    "",
+                    size=(45, 1),
+                    background_color=background_color,
+                    key=f"-NAME-{slot}-",
+                ),
+                sg.Push(background_color=background_color),
+                sg.Text(
+                    "",
+                    size=(30, 1),
+                    justification="right",
+                    background_color=background_color,
+                    key=f"-POSITION-{slot}-",
+                ),
+            ]
+        )
+    halfway = int(PAGE_SIZE / 2)
+    return [
+        sg.Column(
+            pkmn_rows[:halfway],
+            vertical_scroll_only=True,
+            scrollable=True,
+            size=(600, 300),
+            key="-PKMN-0-",
+        ),
+        sg.Column(
+            pkmn_rows[halfway:],
+            vertical_scroll_only=True,
+            scrollable=True,
+            size=(600, 300),
+            key="-PKMN-1-",
+        ),
+    ]
+
+
+def page_count() -> int:
+    return max(1, -(-len(pkmn_dex) // PAGE_SIZE))
+
+
+def bind_page(window, page: int):
+    # Rebind the row pool to entries page * PAGE_SIZE onwards. Unused rows are blanked.
+    start = page * PAGE_SIZE
+    for slot in range(PAGE_SIZE):
+        count = start + slot
+        if count < len(pkmn_dex):
+            window[f"-CHECK-{slot}-"].update(
+                value=pkmn_dex[count].complete, disabled=False
+            )
+            window[f"-NAME-{slot}-"].update(value=describe_pkmn(pkmn_dex[count]))
+        else:
+            window[f"-CHECK-{slot}-"].update(value=False, disabled=True)
+            window[f"-NAME-{slot}-"].update(value="")
+            window[f"-POSITION-{slot}-"].update(value="")
+            shown_positions[f"-POSITION-{slot}-"] = ""
+    update_positions(window, page)
+    window["-PAGE-"].update(value=f"Page {page + 1}/{page_count()}")
+
+
+def update_positions(window, page: int = 0):
+    # Only the rows that exist on screen (every row in full mode, the pool in paged mode)
+    # and only labels whose text actually changed get an .update()
+    if LIST_MODE == "paged":
+        start = page * PAGE_SIZE
+        rows = [
+            (slot, start + slot)
+            for slot in range(min(PAGE_SIZE, len(pkmn_dex) - start))
+        ]
+    else:
+        rows = [(count, count) for count in range(len(pkmn_dex))]
+    for row, count in rows:
+        key = f"-POSITION-{row}-"
+        label = describe_position(count)
+        if shown_positions.get(key) != label:
+            window[key].update(value=label)
+            shown_positions[key] = label
+
+
+def apply_layout(window, page: int = 0):
+    # Re-sort and re-slot the dex for a new LAYOUT. Only rows now showing a different
+    # entry and labels showing a different slot are updated.
+    previous = build_positions()
+    if LIST_MODE == "paged":
+        bind_page(window, page)
+        return
+    for count, key in enumerate(positions.keys):
+        if count >= len(previous.keys) or previous.keys[count] != key:
+            window[count].update(value=pkmn_dex[count].complete)
+            window[f"-NAME-{count}-"].update(value=describe_pkmn(pkmn_dex[count]))
+    update_positions(window, page)
+
+
+def update_progress(window, completed: int):
+    window["-PROGRESS-"].update(completed)
+    window["-PROGRESS-TEXT-"].update(f"{completed}/{len(pkmn_dex)}")
 
 
 def make_window1():
     layout = [
         [sg.Text("Gotta Catch them all!")],
-        list_pkmn,
+        generate_pkmn_rows(),
+    ]
+    if LIST_MODE == "paged":
+        layout.append(
+            [
+                sg.Push(),
+                sg.Button("Prev", key="-PAGE-PREV-"),
+                sg.Text(key="-PAGE-", size=(12, 1), justification="c"),
+                sg.Button("Next", key="-PAGE-NEXT-"),
+                sg.Push(),
+            ]
+        )
+    layout.append(
         [
             sg.Save(),
             sg.Exit(),
@@ -108,10 +353,7 @@ def make_window1():
             sg.ProgressBar(
                 max_value=len(pkmn_dex), key="-PROGRESS-", size=(50, 10), style="clam"
             ),
-            sg.Text(
-                f"{len([x for x in pkmn_dex if x['Complete']])}/{len(pkmn_dex)}",
-                key="-PROGRESS-TEXT-",
-            ),
+            sg.Text(key="-PROGRESS-TEXT-", size=(12, 1)),
             sg.Push(),
             sg.Text("Box Offset", justification="right"),
             sg.Spin(
@@ -120,15 +362,36 @@ def make_window1():
                 enable_events=True,
                 key="-BOXOFFSET-",
             ),
+            sg.Text("List", justification="right"),
+            sg.Combo(
+                LIST_MODES,
+                default_value=LIST_MODE,
+                readonly=True,
+                key="-LISTMODE-",
+                tooltip="Takes effect on next launch",
+            ),
+            sg.Text("Layout", justification="right"),
+            sg.Combo(
+                list(LAYOUTS),
+                default_value=LAYOUT,
+                readonly=True,
+                enable_events=True,
+                key="-LAYOUT-",
+            ),
         ],
-    ]
-    return sg.Window("Perfect Living Dex", layout, finalize=True)
+    )
+    window = sg.Window("Perfect Living Dex", layout, finalize=True)
+    if LIST_MODE == "paged":
+        bind_page(window, 0)
+    update_progress(window, len([x for x in pkmn_dex if x.complete]))
+    return window
 
 
 def convert_to_bytes(file_or_bytes, resize=None):
     '''
     Will convert into bytes and optionally resize an image that is a file or a base64 bytes object.
     Turns into  PNG format in the process so that can be displayed by tkinter
+    Files go through sprite_cache, so each file/size is only converted once.
     :param file_or_bytes: either a string filename or a bytes base64 image object
     :type file_or_bytes:  (Union[str, bytes])
     :param resize:  optional new size
@@ -136,6 +399,12 @@ def convert_to_bytes(file_or_bytes, resize=None):
     :return: (bytes) a byte-string object
     :rtype: (bytes)
     '''
+    if isinstance(file_or_bytes, str):
+        return sprite_cache.get(file_or_bytes, resize)
+    return _render_png(file_or_bytes, resize)
+
+
+def _render_png(file_or_bytes, resize=None):
     if isinstance(file_or_bytes, str):
         img = PIL.Image.open(file_or_bytes)
     else:
@@ -157,101 +426,275 @@ def convert_to_bytes(file_or_bytes, resize=None):
     pass
 
 
+# Display-ready PNG bytes for sprites and art, filled by convert_to_bytes
+sprite_cache = SpriteCache(render=_render_png)
+# Every image packed into one memory-mapped file, opened by main() if it's there and current
+sprite_bundle = None
+# Normal and shiny art for the info window, bounded so flipping through boxes keeps memory flat
+INFO_ART_BYTES = 16 * 1024 * 1024
+info_art = BytesLRU(INFO_ART_BYTES)
+# Image suffixes for the prefetch thread to load, one list per click in the boxes window
+prefetch_queue: "queue.Queue[List[str]]" = queue.Queue()
+
+
+def image_bytes(folder: str, image_suffix: str) -> bytes:
+    # Bundled images are already PNGs, so they skip Pillow and the sprite cache entirely.
+    # tkinter only accepts bytes, so the slice of the mapping is copied once here.
+    if sprite_bundle is not None:
+        if (image := sprite_bundle.get(f"{folder}/{image_suffix}")) is not None:
+            return bytes(image)
+    return convert_to_bytes(str(Path(IMG_DIR) / folder / image_suffix))
+
+
+# Tab key -> (box number, name width) for boxes whose widgets haven't been created yet
+unbuilt_box_tabs: Dict[str, Tuple[int, int]] = {}
+
+
+def make_box_rows(box_no: int, longest_name: int) -> List[List[sg.Element]]:
+    # The box's entries come straight from the position table, row by row. Slots left
+    # empty by the layout policy just have no widgets, same as the end of the last box.
+    by_row: Dict[int, List[int]] = {}
+    for count in positions.box_range(box_no, STARTING_PC_BOX):
+        _, row_no, _ = calculate_box_row_pos(count)
+        by_row.setdefault(row_no, []).append(count)
+    tab_contents = []
+    for row_no in sorted(by_row):
+        # Make the sets of 2 rows. Text and image
+        header_row_contents = [sg.Push()]
+        image_row_contents = [sg.Push()]
+        form_row_contents = [sg.Push()]
+        for count in by_row[row_no]:
+            found_pkmn = pkmn_dex[count]
+            pkmn_name, img_path_suffix, form_name = (
+                found_pkmn.name,
+                found_pkmn.form_image,
+                found_pkmn.form,
+            )
+            image_row_contents.append(
+                sg.Button(
+                    "",
+                    image_data=image_bytes("sprite", img_path_suffix),
+                    key=f"-SPRITE-{count}-",
+                    button_color=(
+                        sg.theme_background_color(),
+                        sg.theme_background_color(),
+                    ),
+                    border_width=0,
+                )
+            )
+            header_row_contents.append(
+                sg.Text(f"{pkmn_name}", justification="c", size=(longest_name, None))
+            )
+            form_row_contents.append(
+                sg.Text(f"{form_name}", justification="c", size=(longest_name, None))
+            )
+            image_row_contents.append(sg.Push())
+            header_row_contents.append(sg.Push())
+            form_row_contents.append(sg.Push())
+        tab_contents.append(image_row_contents)
+        tab_contents.append(header_row_contents)
+        tab_contents.append(form_row_contents)
+    return tab_contents
+
+
+def build_box_tab(window, tab_key: str):
+    # Called when a tab is selected, creates its widgets the first time only
+    if unbuilt := unbuilt_box_tabs.pop(tab_key, None):
+        box_no, longest_name = unbuilt
+        window.extend_layout(window[tab_key], make_box_rows(box_no, longest_name))
+
+
 def make_window2():
-    pkmn_name_location = []
     longest_name = 0
-    # Pulling information for ease of use
-    for count, pkmn in enumerate(pkmn_dex):
-        if len(pkmn["Name"]) > 0:
-            longest_name = len(pkmn["Name"])
-        box, row, pos = calculate_box_row_pos(count)
-        pkmn_name_location.append((pkmn["Name"], pkmn["Form_Image"], box, row, pos, pkmn["Form"]))
+    for pkmn in pkmn_dex:
+        if len(pkmn.name) > 0:
+            longest_name = len(pkmn.name)
     # Get important information to creating boxes
-    first_box_no = min([x[2] for x in pkmn_name_location])
-    last_box_no = max([x[2] for x in pkmn_name_location])
-    box_nos = range(first_box_no, last_box_no + 1)
-    row_nos = range(1, 5+1)
-    pos_nos = range(1, 6+1)
+    box_nos = sorted({box for box, _, _ in positions.positions(STARTING_PC_BOX)})
     tab_group_contents = []
+    unbuilt_box_tabs.clear()
     # Each box is a sg.Tab("Box {No}", [list of 10 lists. 5 text and 5 image each])
+    # Only the first box is filled in now, the others when they are first selected.
     for box_no in box_nos:
+        tab_key = f"-BOX-{box_no}-"
         tab_contents = []
-        for row_no in row_nos:
-            # Make the sets of 2 rows. Text and image
-            header_row_contents = [sg.Push()]
-            image_row_contents = [sg.Push()]
-            form_row_contents = [sg.Push()]
-            for pos_no in pos_nos:
-                if found_pkmn := [(x[0], x[1], x[5]) for x in pkmn_name_location if x[2] == box_no and x[3] == row_no and x[4] == pos_no]:
-                    pkmn_name, img_path_suffix, form_name = found_pkmn[0]
-                    # image_row_contents.append(sg.Image(convert_to_bytes(f"images\\sprite\\{img_path_suffix}")))
-                    image_row_contents.append(sg.Button("", image_data=convert_to_bytes(f"images\\sprite\\{img_path_suffix}"), key=img_path_suffix, button_color=(sg.theme_background_color(), sg.theme_background_color()), border_width=0))
-                    header_row_contents.append(sg.Text(f"{pkmn_name}", justification="c", size=(longest_name, None)))
-                    form_row_contents.append(sg.Text(f"{form_name}", justification="c", size=(longest_name, None)))
-                    image_row_contents.append(sg.Push())
-                    header_row_contents.append(sg.Push())
-                    form_row_contents.append(sg.Push())
-            if image_row_contents:
-                tab_contents.append(image_row_contents)
-                tab_contents.append(header_row_contents)
-                tab_contents.append(form_row_contents)
-        if tab_contents:
-            tab_group_contents.append(sg.Tab(f"Box {box_no:02}", tab_contents, element_justification="c"))
-    return sg.Window("Boxes", [[sg.TabGroup([tab_group_contents])]], finalize=True)
+        if box_no == box_nos[0]:
+            tab_contents = make_box_rows(box_no, longest_name)
+        else:
+            unbuilt_box_tabs[tab_key] = (box_no, longest_name)
+        tab_group_contents.append(
+            sg.Tab(
+                f"Box {box_no:02}", tab_contents, element_justification="c", key=tab_key
+            )
+        )
+    return sg.Window(
+        "Boxes",
+        [[sg.TabGroup([tab_group_contents], enable_events=True, key="-BOXES-")]],
+        finalize=True,
+    )
+
+
+def info_art_bytes(folder: str, image_suffix: str) -> bytes:
+    key = f"{folder}/{image_suffix}"
+    if (data := info_art.get(key)) is None:
+        data = image_bytes(folder, image_suffix)
+        info_art.put(key, data)
+    return data
 
 
 def make_info_window():
-    return sg.Window("Pokemon Image", [[sg.Exit()]], grab_anywhere=True, no_titlebar=True, finalize=True)
+    # Made once and hidden on Exit, each click only swaps the images
+    layout = [
+        [sg.Push(), sg.Text("", key="-INFO-NAME-", justification="c"), sg.Push()],
+        [sg.Push(), sg.Image(key="-INFO-NORMAL-"), sg.Push()],
+        [sg.Push(), sg.Text("Normal image", justification="c"), sg.Push()],
+        [sg.Push(), sg.Image(key="-INFO-SHINY-"), sg.Push()],
+        [sg.Push(), sg.Text("Shiny image", justification="c"), sg.Push()],
+        [sg.Push(), sg.Exit(), sg.Push()],
+    ]
+    return sg.Window(
+        "Pokemon Image", layout, grab_anywhere=True, no_titlebar=True, finalize=True
+    )
+
+
+def show_info(info_window, count: int):
+    # count comes from the clicked button's key, form images are shared between forms
+    pkmn = pkmn_dex[count]
+    if info_window is None:
+        info_window = make_info_window()
+    info_window["-INFO-NAME-"].update(f"{pkmn.name} ({pkmn.form})")
+    info_window["-INFO-NORMAL-"].update(data=info_art_bytes("normal", pkmn.form_image))
+    info_window["-INFO-SHINY-"].update(data=info_art_bytes("shiny", pkmn.form_image))
+    info_window.un_hide()
+    prefetch_neighbors(count)
+    return info_window
+
+
+def prefetch_neighbors(count: int):
+    # Queue the art of every other slot in the same box, nearest to the clicked one first
+    box, _, _ = calculate_box_row_pos(count)
+    neighbors = sorted(
+        positions.box_range(box, STARTING_PC_BOX), key=lambda c: abs(c - count)
+    )
+    prefetch_queue.put([pkmn_dex[c].form_image for c in neighbors if c != count])
+
+
+def prefetch_art():
+    # Runs on its own thread, only fills info_art, never touches a window.
+    # A newer click replaces what is left of the older one.
+    while True:
+        suffixes = prefetch_queue.get()
+        for image_suffix in suffixes:
+            if not prefetch_queue.empty():
+                break
+            for folder in ("normal", "shiny"):
+                try:
+                    info_art_bytes(folder, image_suffix)
+                except OSError as e:
+                    logger.debug(f"Could not prefetch {folder}/{image_suffix}: {e}")
 
 
 def main():
+    global STARTING_PC_BOX, LAYOUT, sprite_bundle
+    sg.theme("Dark Green 7")
+    load_settings()
+    if not Path(JSON_FILE).exists() and not first_run_scrape():
+        return
+    load_dex()
+    # One file open for every sprite. Without a bundle, start loading the loose sprites in
+    # the background instead, on later launches they come straight from the sprite cache.
+    sprite_bundle = SpriteBundle.open(IMG_DIR)
+    if sprite_bundle is None:
+        sprite_cache.warm(
+            [str(Path(IMG_DIR) / "sprite" / pkmn.form_image) for pkmn in pkmn_dex]
+        )
     window1, window2, info_window = make_window1(), make_window2(), None
+    threading.Thread(target=prefetch_art, name="info-art-prefetch", daemon=True).start()
+    # Current page of the checklist when LIST_MODE is "paged"
+    page = 0
+    # Running count of caught entries, kept up to date from checkbox events
+    completed = len([x for x in pkmn_dex if x.complete])
+    if AUTOSAVE_SECONDS:
+        progress.start_autosave(AUTOSAVE_SECONDS)
 
     try:
         while True:
         # Check for events. Will fire off a __TIMEOUT__ every TIMEOUT milliseconds if no events happen
             window, event, values = sg.read_all_windows(timeout=10000)
+            if event == sg.TIMEOUT_EVENT:
+                # Nothing changed, nothing to redraw
+                continue
             logger.debug(f"GUI > windows {window} event {event} with {values}")
             if event == "-BOXOFFSET-":
                 if window == window1:
                     STARTING_PC_BOX = values["-BOXOFFSET-"]
-                    for count in range(len(pkmn_dex)):
-                        box, row, pos = calculate_box_row_pos(count)
-                        window1[f"-POSITION-{count}-"].update(value=f"Box {box:02}, Row {row:02}, Position {pos:02}")
-                    window1.refresh()
+                    update_positions(window1, page)
+                    # Box tab titles and the lazily built tabs are numbered from the
+                    # offset, so the boxes window starts over like on a layout change
+                    window2.close()
+                    window2 = make_window2()
+            elif window == window1 and event == "-LAYOUT-":
+                LAYOUT = values["-LAYOUT-"]
+                apply_layout(window1, page)
+                # Box tabs are built from the position table, so the boxes window starts over
+                window2.close()
+                window2 = make_window2()
+            elif window == window1 and event in ("-PAGE-PREV-", "-PAGE-NEXT-"):
+                page = min(
+                    max(page + (1 if event == "-PAGE-NEXT-" else -1), 0),
+                    page_count() - 1,
+                )
+                bind_page(window1, page)
+            elif window == window1 and (
+                isinstance(event, int) or str(event).startswith("-CHECK-")
+            ):
+                # Checkboxes write straight into the model. Paged rows are reused across pages,
+                # so their entry comes from the current page.
+                count = (
+                    event
+                    if isinstance(event, int)
+                    else page * PAGE_SIZE + int(event[7:-1])
+                )
+                if pkmn_dex[count].complete != values[event]:
+                    pkmn_dex[count].complete = values[event]
+                    progress.record(pkmn_dex[count])
+                    completed += 1 if values[event] else -1
+                    update_progress(window1, completed)
             elif event == "Save" and window == window1:
-                settings = {}
+                settings = {
+                    "-AUTOSAVE-": AUTOSAVE_SECONDS,
+                    "-STORAGE-": STORAGE,
+                    "-DEXES-": DEXES,
+                }
                 for k, v in values.items():
-                    if k == "-BOXOFFSET-":
+                    if k in ("-BOXOFFSET-", "-LISTMODE-", "-LAYOUT-"):
                         settings[k] = v
-                    if isinstance(k, int):
-                        pkmn_dex[k]["Complete"] = v
-                with open(JSON_FILE, "w", encoding="windows-1252") as pkmn_json:
-                    json.dump(pkmn_dex, pkmn_json, indent=2)
+                # Only appends the checkbox changes since the last save
+                progress.flush()
                 with open(SETTINGS_FILE, "w") as settings_json:
                     json.dump(settings, settings_json, indent=2)
             elif (window == window1 or window == window2) and (event == sg.WIN_CLOSED or event == "Exit"):
                 break
-            elif window == window2 and ".png" in event:
-                image_suffix = event
-                pkmn_info_layout = [[sg.Push(), sg.Image(convert_to_bytes(f"images\\normal\\{image_suffix}")), sg.Push()], [sg.Push(), sg.Text("Normal image", justification="c"),sg.Push()], [sg.Push(), sg.Image(convert_to_bytes(f"images\\shiny\\{image_suffix}")), sg.Push()], [sg.Push(), sg.Text("Shiny image", justification="c"), sg.Push()], [sg.Push(), sg.Exit(), sg.Push()]]
-                logger.info(f"Displaying Pokemon image {image_suffix}")
-                info_window = sg.Window("Pokemon Image", pkmn_info_layout, grab_anywhere=True, no_titlebar=True, finalize=True)
+            elif window == window2 and event == "-BOXES-":
+                build_box_tab(window2, values["-BOXES-"])
+            elif window == window2 and str(event).startswith("-SPRITE-"):
+                logger.info(f"Displaying Pokemon image {event}")
+                info_window = show_info(info_window, int(event[8:-1]))
             elif window == info_window and event == "Exit":
-                info_window.close()
-            if True:
-                window1["-PROGRESS-"].update(len([x for x in pkmn_dex if x["Complete"]]))
-                window1["-PROGRESS-TEXT-"].update(
-                    f"{len([x for x in pkmn_dex if x['Complete']])}/{len(pkmn_dex)}"
-                )
-                window2.refresh()
+                info_window.hide()
+            elif window == info_window and event == sg.WIN_CLOSED:
+                info_window = None
     except Exception as e:
         sg.Print("Exception in the program: ", sg.__file__, e, keep_on_top=True, wait=True)
 
+    if AUTOSAVE_SECONDS:
+        progress.stop_autosave()
     window1.close()
     window2.close()
     if info_window is not None:
         info_window.close()
+    if sprite_bundle is not None:
+        sprite_bundle.close()
 
 
 if __name__ == "__main__":